@@ -1,14 +1,17 @@
 import streamlit as st
-from PIL import Image
+from utils.assets import load_logo
+from utils.warmup import start_warmup
 
 st.set_page_config(
 page_title="Home",
 page_icon="📈"
 )
 
+# Prepara dados, cubo e índices em segundo plano enquanto a Home é lida
+start_warmup()
+
 #img_path = (r'C:\Users\Andre\Desktop\Comunidade DS\FTC Analisando dados com Python\logo.jpg')
-image= Image.open('logo.jpg')
-st.sidebar.image(image, width=120)
+st.sidebar.image(load_logo(), width=120)
 
 st.sidebar.markdown('# Cury Company')
 st.sidebar.markdown('## Fastest Delivery in Town')
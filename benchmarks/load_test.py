@@ -0,0 +1,298 @@
+# Libraries / Bibliotecas
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from benchmarks.synthetic import FIRST_DAY, N_DAYS, write_synthetic_csv
+
+DATA_DIR = 'benchmarks/data'
+RESULTS_DIR = 'benchmarks/results'
+
+# Variável lida por utils/data_loader.py: o CSV que as páginas carregam
+DATASET_ENV = 'CURRY_DATASET'
+
+# Widgets da barra lateral que as sessões mexem
+DATE_LABEL = 'Até qual valor?'
+TRAFFIC_LABEL = 'Quais as condições do trânsito'
+CONDITIONS_LABEL = 'Quais as condições de clima'
+
+# Páginas testadas -> widgets de cada uma (a Home só é reexecutada)
+PAGES = {
+    'Home.py': [],
+    'pages/1_visao_empresa.py': [DATE_LABEL, TRAFFIC_LABEL],
+    'pages/2_visao_entregadores.py': [DATE_LABEL, TRAFFIC_LABEL, CONDITIONS_LABEL],
+    'pages/3_visao_restaurante.py': [DATE_LABEL, TRAFFIC_LABEL, CONDITIONS_LABEL],
+}
+
+PERCENTILES = [50, 90, 95, 99]
+
+# =========================
+# Functions / Funções
+#==========================
+def current_rss_bytes():
+    """ Memória residente atual do processo, em bytes (no Linux; fora dele, o pico) """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        from benchmarks.run_benchmarks import max_rss_bytes
+        return max_rss_bytes()
+
+def latency_summary(latencies):
+    """ Percentis, média e máximo de uma lista de latências em segundos """
+    if not latencies:
+        return {}
+    values = np.asarray(latencies)
+    summary = {f'p{p}_s': round(float(np.percentile(values, p)), 6) for p in PERCENTILES}
+    summary['mean_s'] = round(float(values.mean()), 6)
+    summary['max_s'] = round(float(values.max()), 6)
+    return summary
+
+def install_shared_runtime():
+    """ Um único runtime de teste para todas as sessões do processo
+
+        A cada execução o AppTest troca Runtime._instance por um runtime
+        falso e o apaga ao terminar: com sessões simultâneas, uma sessão
+        apagaria o runtime de outra no meio da execução. Aqui o runtime é
+        criado uma vez (como num servidor real, compartilhado) e as trocas
+        feitas pelo AppTest deixam de ter efeito.
+    """
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    app_test.Runtime = SimpleNamespace(_instance=runtime)
+    return runtime
+
+def change_widget(at, label, rng):
+    """ Troca o valor de um widget da barra lateral por um valor sorteado
+
+        Imput: AppTest já executado, rótulo do widget, gerador aleatório
+        Output: False se o widget não foi desenhado (a execução anterior falhou)
+    """
+    if label == DATE_LABEL:
+        widget = next((w for w in at.sidebar.slider if w.label == label), None)
+        if widget is None:
+            return False
+        # Um dos dias do CSV sintético (o mesmo período do slider das páginas)
+        widget.set_value(FIRST_DAY.to_pydatetime() + timedelta(days=int(rng.integers(0, N_DAYS))))
+    else:
+        widget = next((w for w in at.sidebar.multiselect if w.label == label), None)
+        if widget is None:
+            return False
+        # Nunca vazio: sem nenhuma opção as páginas não têm o que mostrar
+        size = int(rng.integers(1, len(widget.options) + 1))
+        widget.set_value([str(v) for v in rng.choice(widget.options, size=size, replace=False)])
+    return True
+
+def empty_tree(at):
+    """ True se a execução não desenhou nada (falha do AppTest, não da página) """
+    return len(at.main.children) == 0 and len(at.sidebar.children) == 0
+
+def run_session(page, labels, reruns, seed, timeout):
+    """ Uma sessão: abre a página e a reexecuta 'reruns' vezes mexendo nos widgets
+
+        Cada reexecução troca um widget sorteado. Os sorteios dependem só da
+        semente, então uma sessão repete as mesmas interações em qualquer
+        execução do teste.
+
+        Erros da página (at.exception) e falhas do próprio AppTest (árvore
+        vazia, widget ausente) são contados à parte; as execuções com falha
+        do AppTest ficam fora das latências, pois não mediram a página.
+
+        Imput: página, rótulos dos widgets, reexecuções, semente, timeout por execução
+        Output: (AppTest, latências da abertura, latências das reexecuções,
+                 erros da página, falhas do AppTest)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng(seed)
+    errors = []
+    failures = []
+
+    def timed_run(latencies):
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        errors.extend(e.value for e in at.exception)
+        if empty_tree(at):
+            failures.append('árvore vazia: o AppTest não desenhou a página')
+        else:
+            latencies.append(elapsed)
+
+    at = AppTest.from_file(page, default_timeout=timeout)
+    first = []
+    timed_run(first)
+
+    latencies = []
+    for _ in range(reruns):
+        if labels and not change_widget(at, labels[rng.integers(0, len(labels))], rng):
+            # Sem o widget a reexecução repetiria a anterior: não entra nas latências
+            failures.append('widget ausente: a execução anterior não desenhou a barra lateral')
+            timed_run([])
+            continue
+        timed_run(latencies)
+    return at, first, latencies, errors, failures
+
+def run_page(page, sessions, reruns, seed, timeout):
+    """ Roda 'sessions' sessões simultâneas (uma thread cada) na mesma página
+
+        As sessões ficam vivas até todas terminarem: a memória medida inclui
+        o estado de cada uma, além dos caches compartilhados.
+
+        Imput: página, sessões, reexecuções por sessão, semente, timeout por execução
+        Output: dicionário com latências, vazão e memória da página
+    """
+    from utils.result_cache import cache_stats
+
+    page_seed = list(PAGES).index(page)
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, page, PAGES[page], reruns, [seed, page_seed, i], timeout)
+                   for i in range(sessions)]
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - start
+    rss_after = current_rss_bytes()
+
+    first = [latency for _, session_first, _, _, _ in results for latency in session_first]
+    latencies = [latency for _, _, session_latencies, _, _ in results for latency in session_latencies]
+    errors = [error for _, _, _, session_errors, _ in results for error in session_errors]
+    failures = [failure for _, _, _, _, session_failures in results for failure in session_failures]
+
+    return {'page': page,
+            'errors': len(errors),
+            'error_messages': sorted(set(errors)),
+            'harness_failures': len(failures),
+            'harness_failure_messages': sorted(set(failures)),
+            'first_run': latency_summary(first),
+            'rerun': latency_summary(latencies),
+            'wall_s': round(wall, 3),
+            'throughput_runs_per_s': round((len(first) + len(latencies)) / wall, 3),
+            'rss_before_bytes': rss_before,
+            'rss_after_bytes': rss_after,
+            'rss_growth_per_session_bytes': int((rss_after - rss_before) / sessions),
+            'result_cache': cache_stats()}
+
+def run_load_test(rows=50_000, sessions=8, reruns=10, seed=0, pages=None, data_dir=DATA_DIR, timeout=300):
+    """ Gera (ou reutiliza) o CSV sintético e mede cada página sob carga
+
+        As páginas leem o CSV de CURRY_DATASET, definido aqui antes de
+        importar qualquer módulo de utils/ (os caminhos padrão são lidos na
+        importação).
+
+        Imput: linhas do CSV sintético, sessões simultâneas, reexecuções por
+               sessão, semente, páginas (None = todas), pasta dos CSVs, timeout
+        Output: dicionário com o ambiente, os parâmetros e os resultados
+    """
+    path = os.path.join(data_dir, f'train_{rows}_{seed}.csv')
+    if not os.path.exists(path):
+        print(f'Gerando {path}...')
+        write_synthetic_csv(path, rows, seed)
+
+    loaded = sys.modules.get('utils.data_loader')
+    if loaded is not None and loaded.DATASET_PATH != path:
+        raise RuntimeError(f'utils.data_loader já foi importado com {loaded.DATASET_PATH}')
+    os.environ[DATASET_ENV] = path
+
+    from benchmarks.run_benchmarks import git_commit
+
+    install_shared_runtime()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'streamlit': st.__version__,
+        'cpu_count': os.cpu_count(),
+        'rows': rows,
+        'csv_bytes': os.path.getsize(path),
+        'sessions': sessions,
+        'reruns': reruns,
+        'seed': seed,
+        'pages': [],
+    }
+
+    for page in pages or list(PAGES):
+        print(f'{page}: {sessions} sessões x {reruns} reexecuções...')
+        result = run_page(page, sessions, reruns, seed, timeout)
+        report['pages'].append(result)
+        print(f'  p50 {result["rerun"].get("p50_s", 0):.3f} s  p95 {result["rerun"].get("p95_s", 0):.3f} s  '
+              f'{result["throughput_runs_per_s"]:.1f} exec/s  '
+              f'+{result["rss_growth_per_session_bytes"] / 2**20:.1f} MiB/sessão  {result["errors"]} erros  '
+              f'{result["harness_failures"]} falhas do AppTest')
+    return report
+
+def compare(report, baseline):
+    """ Compara as latências de reexecução com as de um relatório anterior
+
+        Imput: relatório atual, relatório de referência
+        Output: Dataframe com p50/p95 dos dois e a razão atual / referência
+    """
+    def by_page(r):
+        return {p['page']: p['rerun'] for p in r['pages'] if p['rerun']}
+
+    current, reference = by_page(report), by_page(baseline)
+    rows = []
+    for page in current.keys() & reference.keys():
+        row = {'page': page}
+        for key in ('p50_s', 'p95_s'):
+            row[f'{key}_base'] = reference[page][key]
+            row[key] = current[page][key]
+            row[f'{key}_ratio'] = round(current[page][key] / reference[page][key], 3) if reference[page][key] else None
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values('page').reset_index(drop=True) if rows else pd.DataFrame()
+
+# ========================================================================================================
+# Teste de carga: python -m benchmarks.load_test --rows 200000 --sessions 16 [--baseline anterior.json]
+# ========================================================================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Teste de carga das páginas com várias sessões simultâneas (AppTest)')
+    parser.add_argument('--rows', type=int, default=50_000, help='linhas do CSV sintético')
+    parser.add_argument('--sessions', type=int, default=8, help='sessões simultâneas por página')
+    parser.add_argument('--reruns', type=int, default=10, help='reexecuções por sessão')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=None)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--timeout', type=float, default=300, help='timeout de cada execução, em segundos')
+    parser.add_argument('--output', default=None,
+                        help='arquivo JSON de saída (padrão: benchmarks/results/load_<commit>.json)')
+    parser.add_argument('--baseline', default=None, help='relatório anterior para comparar')
+    args = parser.parse_args()
+
+    report = run_load_test(args.rows, args.sessions, args.reruns, args.seed, args.pages,
+                           args.data_dir, args.timeout)
+
+    output = args.output or os.path.join(RESULTS_DIR, f'load_{report["commit"] or "local"}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Resultados gravados em {output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        different = [k for k in ('rows', 'sessions', 'reruns', 'seed') if baseline.get(k) != report[k]]
+        if different:
+            print(f'Aviso: a referência usou outros parâmetros ({", ".join(different)})')
+        print(compare(report, baseline).to_string(index=False))
@@ -0,0 +1,255 @@
+# Libraries / Bibliotecas
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.synthetic import write_synthetic_csv
+from utils.bitmaps import BitmapIndex
+from utils.cube import OrderCube
+from utils.data_loader import clean_code, read_train_csv
+from utils.filters import filter_orders
+from utils.geo import delivery_distance, mean_distance_by
+from utils.ranking import rank_deliverers
+from utils.sketches import TimeQuantileCube
+
+SIZES = [50_000, 1_000_000, 10_000_000]
+DATA_DIR = 'benchmarks/data'
+RESULTS_DIR = 'benchmarks/results'
+
+# Estado padrão da barra lateral das páginas
+DATE_LIMIT = datetime(2022, 4, 6)
+TRAFFIC_OPTIONS = ['Low', 'Medium', 'High', 'Jam']
+CONDITIONS_OPTIONS = ['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms',
+                      'conditions Stormy', 'conditions Sunny']
+
+# =========================
+# Stages / Etapas
+#==========================
+# Cada etapa recebe e pode completar o dicionário 'ctx' com seus resultados
+def stage_read_csv(ctx):
+    ctx['raw'] = read_train_csv(ctx['path'])
+
+def stage_clean_code(ctx):
+    ctx['df1'] = clean_code(ctx.pop('raw'))
+
+def stage_filter_chain(ctx):
+    ctx['filtered'] = filter_orders(ctx['df1'], DATE_LIMIT,
+                                    Road_traffic_density=TRAFFIC_OPTIONS,
+                                    Weatherconditions=CONDITIONS_OPTIONS)
+
+def stage_build_bitmaps(ctx):
+    ctx['bitmaps'] = BitmapIndex(ctx['df1'])
+
+def stage_bitmap_filter_chain(ctx):
+    filter_orders(ctx['df1'], DATE_LIMIT, index=ctx['bitmaps'],
+                  Road_traffic_density=TRAFFIC_OPTIONS,
+                  Weatherconditions=CONDITIONS_OPTIONS)
+
+def stage_build_cube(ctx):
+    ctx['cube'] = OrderCube(ctx['df1'])
+    ctx['cells'] = ctx['cube'].mask(DATE_LIMIT, Road_traffic_density=TRAFFIC_OPTIONS)
+
+def stage_order_metric(ctx):
+    ctx['cube'].time_rollup(ctx['cells'], 'day')
+
+def stage_order_share_by_week(ctx):
+    ctx['cube'].time_rollup(ctx['cells'], 'week', deliverers=True)
+
+def stage_top_delivers(ctx):
+    rank_deliverers(ctx['filtered'], k=10, metric='min')
+
+def stage_distance(ctx):
+    delivery_distance(ctx['filtered'])
+    mean_distance_by(ctx['filtered'], 'City')
+
+def stage_avg_std_time_on_traffic(ctx):
+    (ctx['filtered'].groupby(['City', 'Road_traffic_density'], observed=True)['Time_taken(min)']
+                    .agg(['mean', 'std']))
+
+def stage_time_quantiles(ctx):
+    sketches = TimeQuantileCube(ctx['df1'])
+    sketches.quantiles(sketches.mask(DATE_LIMIT), by='City')
+
+STAGES = [
+    ('read_csv', stage_read_csv),
+    ('clean_code', stage_clean_code),
+    ('filter_chain', stage_filter_chain),
+    ('build_bitmaps', stage_build_bitmaps),
+    ('bitmap_filter_chain', stage_bitmap_filter_chain),
+    ('build_cube', stage_build_cube),
+    ('order_metric', stage_order_metric),
+    ('order_share_by_week', stage_order_share_by_week),
+    ('top_delivers', stage_top_delivers),
+    ('distance', stage_distance),
+    ('avg_std_time_on_traffic', stage_avg_std_time_on_traffic),
+    ('time_quantiles', stage_time_quantiles),
+]
+
+# =========================
+# Functions / Funções
+#==========================
+def git_commit():
+    """ Commit atual do repositório (ou None fora de um repositório git) """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def max_rss_bytes():
+    """ Pico de memória residente do processo até agora, em bytes """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB, macOS em bytes
+    return rss if platform.system() == 'Darwin' else rss * 1024
+
+class ArrowPeak:
+    """ Pico de memória do pool do Arrow durante um trecho (acima do início)
+
+        O tracemalloc só enxerga alocações do Python/numpy: os buffers do
+        pyarrow (leitura do CSV, conversões) ficam no pool do Arrow, que é
+        amostrado em uma thread. O pico do próprio pool (max_memory) cobre
+        os picos curtos demais para a amostragem quando superam os anteriores.
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.pool = pa.default_memory_pool()
+
+    def __enter__(self):
+        self.start = pa.total_allocated_bytes()
+        self.start_max = self.pool.max_memory() or 0
+        self.peak = self.start
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, pa.total_allocated_bytes())
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, pa.total_allocated_bytes())
+        pool_max = self.pool.max_memory() or 0
+        if pool_max > self.start_max:
+            self.peak = max(self.peak, pool_max)
+        self.peak_bytes = self.peak - self.start
+        return False
+
+@contextmanager
+def peak_memory():
+    """ Picos de memória de um trecho: {'python': tracemalloc, 'arrow': ArrowPeak}, em bytes """
+    peaks = {}
+    tracemalloc.start()
+    try:
+        with ArrowPeak() as arrow:
+            yield peaks
+    finally:
+        peaks['python'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    peaks['arrow'] = arrow.peak_bytes
+
+def run_stages(path, repeat=3):
+    """ Esta função mede cada etapa sobre um CSV
+
+        Cada etapa roda 'repeat' vezes; guarda o menor e o mediano tempo e,
+        da primeira execução, o pico de memória alocada pelo Python/numpy
+        (tracemalloc) e pelo pool do Arrow (ArrowPeak). 'peak_alloc_bytes'
+        soma os dois (limite superior: os picos podem não coincidir).
+
+        Imput: caminho do CSV, repetições
+        Output: lista de dicionários, um por etapa
+    """
+    results = []
+    ctx = {'path': path}
+
+    for name, stage in STAGES:
+        timings = []
+        for i in range(repeat):
+            # Etapas que consomem o resultado anterior (ex.: clean_code) precisam dele de novo
+            run_ctx = dict(ctx)
+            with peak_memory() if i == 0 else nullcontext({}) as measured:
+                start = time.perf_counter()
+                stage(run_ctx)
+                timings.append(time.perf_counter() - start)
+            if i == 0:
+                peaks = measured
+        ctx = run_ctx
+
+        peak = peaks['python'] + peaks['arrow']
+        results.append({'stage': name,
+                        'min_s': round(min(timings), 6),
+                        'median_s': round(float(np.median(timings)), 6),
+                        'peak_alloc_bytes': peak,
+                        'peak_python_bytes': peaks['python'],
+                        'peak_arrow_bytes': peaks['arrow']})
+        print(f'  {name:<28} {min(timings):10.4f} s  {peak / 2**20:10.1f} MiB '
+              f'(Python {peaks["python"] / 2**20:.1f}, Arrow {peaks["arrow"] / 2**20:.1f})')
+
+    return results
+
+def run_benchmarks(sizes=SIZES, repeat=3, data_dir=DATA_DIR, seed=0):
+    """ Gera (ou reutiliza) os CSVs sintéticos e mede as etapas em cada tamanho
+
+        Imput: tamanhos em linhas, repetições, pasta dos CSVs, semente
+        Output: dicionário com o ambiente e os resultados
+    """
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'repeat': repeat,
+        'seed': seed,
+        'sizes': [],
+    }
+
+    for n_rows in sizes:
+        path = os.path.join(data_dir, f'train_{n_rows}_{seed}.csv')
+        if not os.path.exists(path):
+            print(f'Gerando {path}...')
+            write_synthetic_csv(path, n_rows, seed)
+
+        print(f'{n_rows} linhas:')
+        stages = run_stages(path, repeat)
+        report['sizes'].append({'rows': n_rows,
+                                'csv_bytes': os.path.getsize(path),
+                                'max_rss_bytes': max_rss_bytes(),
+                                'stages': stages})
+    return report
+
+# ========================================================================================================
+# Benchmark: python -m benchmarks.run_benchmarks [--sizes 50000 1000000] [--output arquivo.json]
+# ========================================================================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark das etapas do dashboard com dados sintéticos')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--output', default=None,
+                        help='arquivo JSON de saída (padrão: benchmarks/results/<commit>.json)')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.repeat, args.data_dir, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{report["commit"] or "local"}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Resultados gravados em {output}')
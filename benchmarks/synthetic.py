@@ -0,0 +1,131 @@
+# Libraries / Bibliotecas
+import os
+
+import numpy as np
+import pandas as pd
+
+# Mesmas colunas e formato de texto do dataset/train.csv
+COLUMNS = ['ID', 'Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings',
+           'Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude',
+           'Delivery_location_longitude', 'Order_Date', 'Time_Orderd', 'Time_Order_picked',
+           'Weatherconditions', 'Road_traffic_density', 'Vehicle_condition', 'Type_of_order',
+           'Type_of_vehicle', 'multiple_deliveries', 'Festival', 'City', 'Time_taken(min)']
+
+CITY_CODES = ['INDO', 'BANG', 'COIMB', 'CHEN', 'HYD', 'RANCHI', 'MYS', 'DEH', 'KOC', 'PUNE',
+              'LUDH', 'KNP', 'MUM', 'KOL', 'JAP', 'SUR', 'GOA', 'AURG', 'AGR', 'VAD', 'ALH', 'BHP']
+WEATHER = ['conditions Sunny', 'conditions Stormy', 'conditions Sandstorms',
+           'conditions Cloudy', 'conditions Fog', 'conditions Windy']
+TRAFFIC = ['Low ', 'Medium ', 'High ', 'Jam ']
+ORDERS = ['Snack ', 'Meal ', 'Drinks ', 'Buffet ']
+VEHICLES = ['motorcycle ', 'scooter ', 'electric_scooter ', 'bicycle ']
+CITIES = ['Metropolitian ', 'Urban ', 'Semi-Urban ']
+
+N_RESTAURANTS = 500
+RESTAURANT_SEED = 12345
+
+FIRST_DAY = pd.Timestamp(2022, 2, 11)
+N_DAYS = 55
+
+# Fração aproximada de 'NaN ' em cada coluna que pode vir vazia
+NAN_RATE = 0.01
+
+CHUNKSIZE = 500_000
+
+# =========================
+# Functions / Funções
+#==========================
+def _with_nan(rng, values, rate=NAN_RATE):
+    # Troca uma fração dos valores pelo marcador 'NaN ' usado no train.csv
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < rate] = 'NaN '
+    return values
+
+def synthetic_orders(n_rows, seed=0, start_id=0, n_restaurants=N_RESTAURANTS):
+    """ Esta função gera pedidos no mesmo formato (texto) do train.csv
+
+        Inclui os marcadores 'NaN ', os espaços no final dos textos e o
+        tempo no formato '(min) NN'.
+
+        Imput: número de linhas, semente, primeiro número de ID, número de restaurantes
+        Output: Dataframe com as colunas do train.csv, todas como texto
+    """
+    rng = np.random.default_rng(seed)
+    n = n_rows
+
+    # Restaurantes e entregadores (cada entregador atende um restaurante)
+    restaurant = rng.integers(0, n_restaurants, n)
+    city_code = np.array(CITY_CODES, dtype=object)[restaurant % len(CITY_CODES)]
+    deliverer = rng.integers(1, 4, n)
+    deliverer_ids = (city_code + 'RES' + pd.Series(restaurant % 30 + 1).map('{:02d}'.format).to_numpy(dtype=object)
+                     + 'DEL' + pd.Series(deliverer).map('{:02d}'.format).to_numpy(dtype=object) + ' ')
+
+    # As posições dos restaurantes não dependem da semente: são as mesmas em todos os pedaços
+    restaurant_rng = np.random.default_rng(RESTAURANT_SEED)
+    rest_lat = np.round(restaurant_rng.uniform(9.0, 31.0, n_restaurants), 6)[restaurant]
+    rest_lon = np.round(restaurant_rng.uniform(72.0, 88.0, n_restaurants), 6)[restaurant]
+    delivery_lat = np.round(rest_lat + rng.uniform(-0.15, 0.15, n), 6)
+    delivery_lon = np.round(rest_lon + rng.uniform(-0.15, 0.15, n), 6)
+
+    order_date = (FIRST_DAY + pd.to_timedelta(rng.integers(0, N_DAYS, n), unit='D')).strftime('%d-%m-%Y')
+    ordered = pd.to_timedelta(rng.integers(8 * 60, 23 * 60, n), unit='min')
+    picked = ordered + pd.to_timedelta(rng.choice([5, 10, 15], n), unit='min')
+    time_ordered = pd.Series(ordered).astype(str).str[-8:].to_numpy(dtype=object)
+    time_picked = pd.Series(picked).astype(str).str[-8:].to_numpy(dtype=object)
+
+    traffic = rng.integers(0, len(TRAFFIC), n)
+    time_taken = np.clip(rng.normal(20 + 5 * traffic, 6), 10, 54).astype('int64')
+
+    df = pd.DataFrame({
+        'ID': pd.Series(np.arange(start_id, start_id + n)).map('0x{:04x} '.format).to_numpy(dtype=object),
+        'Delivery_person_ID': deliverer_ids,
+        'Delivery_person_Age': _with_nan(rng, rng.integers(20, 40, n).astype(str)),
+        'Delivery_person_Ratings': _with_nan(rng, np.round(rng.uniform(2.5, 5.0, n), 1).astype(str)),
+        'Restaurant_latitude': rest_lat,
+        'Restaurant_longitude': rest_lon,
+        'Delivery_location_latitude': delivery_lat,
+        'Delivery_location_longitude': delivery_lon,
+        'Order_Date': order_date,
+        'Time_Orderd': _with_nan(rng, time_ordered),
+        'Time_Order_picked': time_picked,
+        'Weatherconditions': np.where(rng.random(n) < NAN_RATE, 'conditions NaN',
+                                      np.array(WEATHER, dtype=object)[rng.integers(0, len(WEATHER), n)]),
+        'Road_traffic_density': _with_nan(rng, np.array(TRAFFIC, dtype=object)[traffic]),
+        'Vehicle_condition': rng.integers(0, 4, n),
+        'Type_of_order': np.array(ORDERS, dtype=object)[rng.integers(0, len(ORDERS), n)],
+        'Type_of_vehicle': np.array(VEHICLES, dtype=object)[rng.integers(0, len(VEHICLES), n)],
+        'multiple_deliveries': _with_nan(rng, rng.integers(0, 4, n).astype(str)),
+        'Festival': _with_nan(rng, np.where(rng.random(n) < 0.02, 'Yes ', 'No ')),
+        'City': _with_nan(rng, np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), n)]),
+        'Time_taken(min)': pd.Series(time_taken).map('(min) {}'.format).to_numpy(dtype=object),
+    })
+    return df[COLUMNS]
+
+def write_synthetic_csv(path, n_rows, seed=0, chunksize=CHUNKSIZE):
+    """ Grava um train.csv sintético com n_rows linhas, em pedaços
+
+        Imput: caminho do arquivo, número de linhas, semente, linhas por pedaço
+        Output: caminho do arquivo
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    written = 0
+    while written < n_rows:
+        n = min(chunksize, n_rows - written)
+        df = synthetic_orders(n, seed=seed + written, start_id=written)
+        df.to_csv(path, mode='w' if written == 0 else 'a', header=(written == 0), index=False)
+        written += n
+    return path
+
+# ========================================================================================================
+# Gerador: python -m benchmarks.synthetic <caminho do CSV> <linhas> [semente]
+# ========================================================================================================
+if __name__ == '__main__':
+    import sys
+
+    csv_path = sys.argv[1]
+    n_rows = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    write_synthetic_csv(csv_path, n_rows, seed)
+    print(f'{csv_path}: {n_rows} linhas')
@@ -1,114 +1,74 @@
 # Libraries / Bibliotecas
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from haversine import haversine
 import streamlit as st
 from datetime import datetime
-from PIL import Image
-import folium
-from streamlit_folium import folium_static
+from utils.assets import load_logo
+from utils.bitmaps import load_bitmap_index
+from utils.charts import fit_time_series, plotly_chart
+from utils.cube import load_cube
+from utils.data_loader import current_version, load_data
+from utils.filters import filter_orders
+from utils.spatial import geo_filter_widget
+from utils.profiling import RerunTimer
+from utils.sections import memo, section, state_key
+from utils.warmup import start_warmup
 
 # =========================
 # Functions / Funções
 #==========================
-def clean_code(df1):
-    """ Esta função tem a responsabilidade de limpar o dataframe
-
-        Tipos de limpeza:
-        1. Remoção dos dados NaN
-        2. Mudaça do tipo da coluna de dados
-        3. Remoção dos espaços das variáveis de texto
-        4. Formatação da coluna de datas
-        5. Limpeza da coluna de tempo (Remoção do texto da variável numérica)
-
-        Imput: Dataframe
-        Output: Dataframe    
-    """
-    # Filtrar linhas onde 'Delivery_person_Age' não é NaN
-    selected_lines = (df1['Delivery_person_Age'] != 'NaN ')
-    df1 = df1.loc[selected_lines, :].copy()
-
-    # 1. Convertendo a coluna Age de texto para número
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype('int')
-
-    # 2. Convertendo a coluna Rating de texto para número decimal (float)
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype('float')
-
-    # 3. Convertendo a coluna Date de texto para Datetime
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-
-    # 4. Convertendo a coluna Multiple Delivery para Int
-    selected_lines = df1['multiple_deliveries'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype('int')
-
-    # 5. Removendo NaN das colunas
-    selected_lines = df1['Road_traffic_density'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['City'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['Type_of_vehicle'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['Festival'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    # 6. Removendo espaços dentro de strings
-    df1 = df1.reset_index(drop=True)
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Delivery_person_ID'] = df1.loc[:, 'Delivery_person_ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-
-    # 7. Limpando a coluna 'Time_taken(min)'
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-    return df1
-
-def order_metric(df1):
-    df_aux = df1[['ID', 'Order_Date']].groupby('Order_Date').count().reset_index()
+# plotly, folium e utils.maps são importados dentro das funções: só a visão
+# selecionada paga o custo de importação
+def order_metric(cube, selected, granularidade='day'):
+    import plotly.express as px
+
+    # Quantidade de pedidos por dia, semana ou mês (a partir do cubo)
+    df_aux = cube.time_rollup(selected, granularidade)
+    # Históricos longos são agregados por semana/mês para caber no orçamento de pontos
+    df_aux = fit_time_series(df_aux, 'period', 'orders')
     # Desenhar o gráfico de linhas
-    fig = px.bar(df_aux, x='Order_Date', y='ID')
+    fig = px.bar(df_aux, x='period', y='orders')
     return fig
 
-def traffic_order_share(df1):
-    df_aux = df1[['ID', 'Road_traffic_density']].groupby('Road_traffic_density').count().reset_index()
-    df_aux['Entregas_percent'] = df_aux['ID'] / df_aux['ID'].sum()
+def traffic_order_share(cube, selected):
+    import plotly.express as px
+
+    df_aux = cube.rollup(selected, 'Road_traffic_density')
+    df_aux['Entregas_percent'] = df_aux['orders'] / df_aux['orders'].sum()
     # Gráfico de pizza
     fig = px.pie(df_aux, values='Entregas_percent', names='Road_traffic_density')
     return fig
 
-def traffic_order_city(df1):
-    df_aux = df1[['ID', 'City', 'Road_traffic_density']].groupby(['City', 'Road_traffic_density']).count().reset_index()
+def traffic_order_city(cube, selected):
+    import plotly.express as px
+
+    df_aux = cube.rollup(selected, ['City', 'Road_traffic_density'])
     # Gráfico de bolhas
-    fig = px.scatter(df_aux, x='City', y='Road_traffic_density', size='ID', color='City')
+    fig = px.scatter(df_aux, x='City', y='Road_traffic_density', size='orders', color='City')
     return fig
 
-def order_by_week(df1): 
-    # Criar coluna de semana
-    df1['Week_of_year'] = df1['Order_Date'].dt.strftime('%U')
-    # Quantidade de pedidos por semana
-    df_aux = df1[['ID', 'Week_of_year']].groupby('Week_of_year').count().reset_index()
+def order_by_week(cube, selected, granularidade='week'):
+    import plotly.express as px
+
+    # Quantidade de pedidos por semana (ou dia/mês)
+    df_aux = cube.time_rollup(selected, granularidade)
     # Grafico de linhas
-    fig = px.line(df_aux, x='Week_of_year', y='ID')
+    fig = px.line(df_aux, x='period', y='orders')
     return fig
 
-def order_share_by_week(df1):
-    # Quantidade de pedidos por semana / Número único de entregadores por semana
-    df_aux01 = df1[['ID', 'Week_of_year']].groupby('Week_of_year').count().reset_index()
-    df_aux02 = df1[['Delivery_person_ID', 'Week_of_year']].groupby('Week_of_year').nunique().reset_index()
-    df_aux = pd.merge(df_aux01, df_aux02, how='inner')
-    df_aux['Order_by_deliver'] = df_aux['ID'] / df_aux['Delivery_person_ID']
+def order_share_by_week(cube, selected, granularidade='week'):
+    import plotly.express as px
+
+    # Quantidade de pedidos por semana / Número (estimado) de entregadores únicos por semana
+    df_aux = cube.time_rollup(selected, granularidade, deliverers=True)
+    df_aux['Order_by_deliver'] = df_aux['orders'] / df_aux['deliverers']
     # Desenhando gráfico de linhas
-    fig = px.line(df_aux, x='Week_of_year', y='Order_by_deliver')
+    fig = px.line(df_aux, x='period', y='Order_by_deliver')
     return fig
 
 def country_maps(df1):
-    df_aux = df1[['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']].groupby(['City', 'Road_traffic_density']).median().reset_index()
+    import folium
+    from streamlit_folium import folium_static
+
+    df_aux = df1[['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']].groupby(['City', 'Road_traffic_density'], observed=True).median().reset_index()
 
     # Desenhando gráfico de mapa/pinos
     map = folium.Map()
@@ -120,15 +80,52 @@ def country_maps(df1):
     folium_static(map, width=1024, height=600)
     return None
 
+@section
+def map_section(df1, date_slider, traffic_options):
+    # Fragmento: trocar o modo do mapa não reexecuta o resto da página
+    from utils.maps import MAP_MODES, show_map
+
+    st.markdown('# Country Maps')
+    map_mode = st.radio('Modo do mapa', ['Medianas'] + MAP_MODES, horizontal=True)
+
+    if map_mode == 'Medianas':
+        # Filtro geográfico: só o mapa de medianas usa os pedidos individuais
+        posicoes = geo_filter_widget(st.container())
+
+        # Filtros geográfico, de data e trânsito
+        with timer.stage('filter_orders'):
+            df1 = filter_orders(df1, date_slider, index=load_bitmap_index(), positions=posicoes,
+                                Road_traffic_density=traffic_options)
+
+        with timer.stage('country_maps'):
+            country_maps(df1)
+    else:
+        # Todos os pedidos, agregados em células da grade (HTML em cache por filtro)
+        with timer.stage('show_map'):
+            show_map(map_mode, date_slider, traffic_options)
+    return None
+
 # ========================================================================================================
 # ==================================== Inicio da Estrutura lógica do código ==============================
 # ========================================================================================================
 
-# Read DataFrame / Lendo DataFrame
-df = pd.read_csv('dataset/train.csv')
+# Instrumentação opcional (CURRY_PROFILE=1 ou ?profile=1)
+timer = RerunTimer('visao_empresa')
+
+# Prepara cubo, índices e bibliotecas em segundo plano (uma vez por processo)
+start_warmup()
 
-# Cleaning DataFrame / Limpando DataFrame
-df1 = clean_code(df)
+# Colunas usadas pelo mapa (os gráficos usam o cubo de pedidos)
+COLUMNS = ['Order_Date', 'Road_traffic_density', 'City',
+           'Delivery_location_latitude', 'Delivery_location_longitude']
+
+# Read and clean DataFrame / Lendo e limpando DataFrame (cache compartilhado)
+with timer.stage('load_data'):
+    df1 = load_data(columns=COLUMNS)
+
+# Pre-aggregated order cube / Cubo de pedidos pré-agregado
+with timer.stage('load_cube'):
+    cube = load_cube()
 
 # =========================
 #  Sidebar / Barra Lateral
@@ -136,8 +133,7 @@ df1 = clean_code(df)
 st.header('Marketplace - Visão Cliente')
 
 #image_path = r'C:\Users\Andre\Desktop\Comunidade DS\FTC Analisando dados com Python\logo.jpg'
-image = Image.open('logo.jpg')
-st.sidebar.image(image, width=120)
+st.sidebar.image(load_logo(), width=120)
 
 st.sidebar.markdown('# Cury Company')
 st.sidebar.markdown('## Fastest Delivery in Town')
@@ -160,53 +156,80 @@ traffic_options = st.sidebar.multiselect(
     default=['Low', 'Medium', 'High', 'Jam']
 )
 st.sidebar.markdown('''---''')
-st.sidebar.markdown('### Powered by Comunidade DS')
 
-# Filtro de data
-linhas_selecionadas = df1['Order_Date'] < date_slider
-df1 = df1.loc[linhas_selecionadas, :]
+st.sidebar.markdown('### Powered by Comunidade DS')
 
-# Filtro de Transito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas, :]
+# Estado dos filtros que alimentam os gráficos (página, versão do dataset e sidebar),
+# também usado como chave do cache de resultados compartilhado entre as sessões
+filtros = state_key('visao_empresa', current_version(), date_slider, traffic_options)
 
 # =========================
 #    Layout Streamlit
 # =========================
 
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'])
+# Só a visão selecionada é calculada (st.tabs executaria as três a cada rerun)
+visao = st.radio('Visão', ['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'],
+                 horizontal=True, label_visibility='collapsed')
+
+# Granularidade dos gráficos de pedidos ao longo do tempo
+granularidades = {'Dia': 'day', 'Semana': 'week', 'Mês': 'month'}
 
-with tab1:
+if visao in ('Visão Gerencial', 'Visão Tática'):
+    # Filtros de data e trânsito aplicados às células do cubo
+    with timer.stage('cube_mask'):
+        celulas_selecionadas = cube.mask(date_slider, Road_traffic_density=traffic_options)
+
+if visao == 'Visão Gerencial':
     with st.container():
         # Order Metric
-        fig = order_metric(df1)
         st.markdown('# Orders by Day')
-        st.plotly_chart(fig, use_container_width=True)
+        granularidade = granularidades[st.radio('Granularidade', list(granularidades), index=0,
+                                                horizontal=True, key='granularidade_gerencial')]
+        with timer.stage('order_metric'):
+            fig = memo('order_metric', filtros + (granularidade,),
+                       lambda: order_metric(cube, celulas_selecionadas, granularidade))
+        with timer.stage('order_metric:plotly_chart'):
+            plotly_chart(fig, timer, 'order_metric', use_container_width=True)
 
     with st.container():
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = traffic_order_share(df1)
+            with timer.stage('traffic_order_share'):
+                fig = memo('traffic_order_share', filtros, lambda: traffic_order_share(cube, celulas_selecionadas))
             st.header('Traffic Order Share')
-            st.plotly_chart(fig, use_container_width=True)        
+            with timer.stage('traffic_order_share:plotly_chart'):
+                plotly_chart(fig, timer, 'traffic_order_share', use_container_width=True)        
         
         with col2:
-            fig = traffic_order_city(df1)
+            with timer.stage('traffic_order_city'):
+                fig = memo('traffic_order_city', filtros, lambda: traffic_order_city(cube, celulas_selecionadas))
             st.header(' Traffic Order City')
-            st.plotly_chart(fig, use_container_width=True)                
+            with timer.stage('traffic_order_city:plotly_chart'):
+                plotly_chart(fig, timer, 'traffic_order_city', use_container_width=True)                
+
+elif visao == 'Visão Tática':
+    granularidade = granularidades[st.radio('Granularidade', list(granularidades), index=1,
+                                            horizontal=True, key='granularidade_tatica')]
 
-with tab2:
     with st.container():
         st.markdown('# Order by Week')
-        fig = order_by_week(df1)
-        st.plotly_chart(fig, use_container_width=True)            
+        with timer.stage('order_by_week'):
+            fig = memo('order_by_week', filtros + (granularidade,),
+                       lambda: order_by_week(cube, celulas_selecionadas, granularidade))
+        with timer.stage('order_by_week:plotly_chart'):
+            plotly_chart(fig, timer, 'order_by_week', use_container_width=True)            
 
     with st.container():
-        fig = order_share_by_week(df1)
+        with timer.stage('order_share_by_week'):
+            fig = memo('order_share_by_week', filtros + (granularidade,),
+                       lambda: order_share_by_week(cube, celulas_selecionadas, granularidade))
         st.markdown('# Order Share by Week')
-        st.plotly_chart(fig, use_container_width=True)        
+        with timer.stage('order_share_by_week:plotly_chart'):
+            plotly_chart(fig, timer, 'order_share_by_week', use_container_width=True)        
 
-with tab3:
-    st.markdown('# Country Maps')
-    country_maps(df1)
+else:
+    map_section(df1, date_slider, traffic_options)
+
+# Tempos desta execução (somente com a instrumentação ligada)
+timer.report()
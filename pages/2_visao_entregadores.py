@@ -1,93 +1,100 @@
 # Libraries / Bibliotecas
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from haversine import haversine
+import functools
 import streamlit as st
 from datetime import datetime
-from PIL import Image
-import folium
-from streamlit_folium import folium_static
+from utils.analytics import deliverer_overview, rating_by
+from utils.assets import load_logo
+from utils.bitmaps import load_bitmap_index
+from utils.charts import dataframe
+from utils.data_loader import current_version, load_data
+from utils.deliverers import load_deliverer_stats, stats_page
+from utils.filters import filter_orders
+from utils.ranking import rank_deliverers
+from utils.profiling import RerunTimer
+from utils.sections import memo, section, state_key
+from utils.warmup import start_warmup
 
 # =========================
 # Functions / Funções
 #==========================
-def clean_code(df1):
-    """ Esta função tem a responsabilidade de limpar o dataframe
-
-        Tipos de limpeza:
-        1. Remoção dos dados NaN
-        2. Mudaça do tipo da coluna de dados
-        3. Remoção dos espaços das variáveis de texto
-        4. Formatação da coluna de datas
-        5. Limpeza da coluna de tempo (Remoção do texto da variável numérica)
-
-        Imput: Dataframe
-        Output: Dataframe    
-    """
-    # Filtrar linhas onde 'Delivery_person_Age' não é NaN
-    selected_lines = (df1['Delivery_person_Age'] != 'NaN ')
-    df1 = df1.loc[selected_lines, :].copy()
-
-    # 1. Convertendo a coluna Age de texto para número
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype('int')
-
-    # 2. Convertendo a coluna Rating de texto para número decimal (float)
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype('float')
-
-    # 3. Convertendo a coluna Date de texto para Datetime
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-
-    # 4. Convertendo a coluna Multiple Delivery para Int
-    selected_lines = df1['multiple_deliveries'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype('int')
-
-    # 5. Removendo NaN das colunas
-    selected_lines = df1['Road_traffic_density'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['City'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['Type_of_vehicle'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['Festival'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    # 6. Removendo espaços dentro de strings
-    df1 = df1.reset_index(drop=True)
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Delivery_person_ID'] = df1.loc[:, 'Delivery_person_ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-
-    # 7. Limpando a coluna 'Time_taken(min)'
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-    return df1
-
-def top_delivers(df1, top_asc=False):
-    df2 = df1.groupby(['City', 'Delivery_person_ID'])['Time_taken(min)'].min().reset_index().sort_values(['City', 'Time_taken(min)'], ascending=top_asc)
-
-    df_aux01 = df2[df2['City'] == 'Metropolitian'].head(10)
-    df_aux02 = df2[df2['City'] == 'Urban'].head(10)
-    df_aux03 = df2[df2['City'] == 'Semi-Urban'].head(10)
-
-    df3 = pd.concat([df_aux01, df_aux02, df_aux03]).reset_index(drop=True)
-    return df3
+@section
+def deliverer_table_section(stats):
+    # Fragmento: busca, ordenação e paginação não reexecutam o resto da página
+    ordenacao = {'Pedidos': 'orders',
+                 'Avaliação média': 'rating_mean',
+                 'Desvio padrão da avaliação': 'rating_std',
+                 'Tempo médio de entrega': 'time_mean',
+                 'Menor tempo de entrega': 'time_min',
+                 'Maior tempo de entrega': 'time_max',
+                 'ID': 'Delivery_person_ID'}
+    col1, col2, col3 = st.columns([2, 2, 1])
+    busca = col1.text_input('Buscar entregador (ID)')
+    coluna = ordenacao[col2.selectbox('Ordenar por', list(ordenacao))]
+    crescente = col3.toggle('Crescente')
+
+    # A página volta para 1 quando a busca ou a ordenação mudam
+    consulta = (busca, coluna, crescente)
+    if st.session_state.get('_consulta_entregadores') != consulta:
+        st.session_state['_consulta_entregadores'] = consulta
+        st.session_state['pagina_entregadores'] = 1
+    pagina = st.session_state.get('pagina_entregadores', 1)
+
+    with timer.stage('deliverer_stats_page'):
+        df_pagina, total, n_paginas = stats_page(stats, busca, coluna, crescente, pagina)
+    if pagina > n_paginas:
+        pagina = st.session_state['pagina_entregadores'] = n_paginas
+
+    with timer.stage('ratings_by_deliverer:dataframe'):
+        dataframe(df_pagina, timer, 'ratings_by_deliverer', height=455, hide_index=True, use_container_width=True)
+
+    col1, col2 = st.columns([1, 3])
+    col1.number_input('Página', min_value=1, max_value=n_paginas, step=1, key='pagina_entregadores')
+    col2.caption(f'{total} entregadores, página {pagina} de {n_paginas}')
+    return None
+
+@section
+def ranking_section(pedidos, filtros):
+    # Fragmento: trocar a métrica do ranking não reexecuta o resto da página
+    metricas = {'Menor tempo de entrega': 'min',
+                'Tempo mediano de entrega': 'median',
+                'Tempo médio de entrega': 'mean',
+                'Avaliação média': 'rating'}
+    metrica = metricas[st.selectbox('Ranking por', list(metricas))]
+
+    # Melhores e piores de cada cidade em uma única passada
+    with timer.stage('rank_deliverers'):
+        df_melhores, df_piores = memo('rank_deliverers', filtros + (metrica,),
+                                      lambda: rank_deliverers(pedidos(), k=10, metric=metrica))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown('##### Top Entregadores mais Rápidos' if metrica != 'rating' else '##### Top Entregadores mais bem Avaliados')
+        with timer.stage('top_fastest:dataframe'):
+            dataframe(df_melhores, timer, 'top_fastest')
+
+    with col2:
+        st.markdown('##### Top Entregadores mais Lentos' if metrica != 'rating' else '##### Top Entregadores mais mal Avaliados')
+        with timer.stage('top_slowest:dataframe'):
+            dataframe(df_piores, timer, 'top_slowest')
+    return None
 
 # ========================================================================================================
 # ==================================== Inicio da Estrutura lógica do código ==============================
 # ========================================================================================================
 
-# Read DataFrame / Lendo DataFrame
-df = pd.read_csv('dataset/train.csv')
+# Instrumentação opcional (CURRY_PROFILE=1 ou ?profile=1)
+timer = RerunTimer('visao_entregadores')
 
-# Cleaning DataFrame / Limpando DataFrame
-df1 = clean_code(df)
+# Prepara cubo, índices e bibliotecas em segundo plano (uma vez por processo)
+start_warmup()
+
+# Colunas usadas nesta página (as demais não são carregadas)
+COLUMNS = ['Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings', 'Vehicle_condition',
+           'Order_Date', 'Road_traffic_density', 'Weatherconditions', 'City', 'Time_taken(min)']
+
+# Read and clean DataFrame / Lendo e limpando DataFrame (cache compartilhado)
+with timer.stage('load_data'):
+    df1 = load_data(columns=COLUMNS)
 
 # =========================
 #  Sidebar / Barra Lateral
@@ -95,8 +102,7 @@ df1 = clean_code(df)
 st.header('Marketplace - Visão dos Entregadores')
 
 #image_path = r'C:\Users\Andre\Desktop\Comunidade DS\FTC Analisando dados com Python\logo.jpg'
-image = Image.open('logo.jpg')
-st.sidebar.image(image, width=120)
+st.sidebar.image(load_logo(), width=120)
 
 st.sidebar.markdown('# Cury Company')
 st.sidebar.markdown('## Fastest Delivery in Town')
@@ -119,23 +125,23 @@ traffic_options = st.sidebar.multiselect(
 
 conditions_options = st.sidebar.multiselect(
     'Quais as condições de clima',
-    ['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms', 'conditions Stormy', 'conditions Sunny', 'conditions Sunny'],
-    default=['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms', 'conditions Stormy', 'conditions Sunny', 'conditions Sunny'])
+    ['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms', 'conditions Stormy', 'conditions Sunny'],
+    default=['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms', 'conditions Stormy', 'conditions Sunny'])
 
 st.sidebar.markdown('''---''')
 st.sidebar.markdown('### Powered by Comunidade DS')
 
-# Filtro de data
-linhas_selecionadas = df1['Order_Date'] < date_slider
-df1 = df1.loc[linhas_selecionadas, :]
-
-# Filtro de Transito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas, :]
+# Estado dos filtros que alimentam as seções (página, versão do dataset e sidebar),
+# também usado como chave do cache de resultados compartilhado entre as sessões
+filtros = state_key('visao_entregadores', current_version(), date_slider, traffic_options, conditions_options)
 
-# Filtro de Condições Climáticas
-linhas_selecionadas = df1['Weatherconditions'].isin(conditions_options)
-df1 = df1.loc[linhas_selecionadas, :]
+# Filtros de data, trânsito e condições climáticas (aplicados só se alguma seção recalcular)
+@functools.cache
+def pedidos():
+    with timer.stage('filter_orders'):
+        return filter_orders(df1, date_slider, index=load_bitmap_index(),
+                             Road_traffic_density=traffic_options,
+                             Weatherconditions=conditions_options)
 
 # =========================
 #    Layout Streamlit
@@ -148,53 +154,55 @@ with tab1:
         st.title('Overall Metrics')
         col1, col2, col3, col4 = st.columns(4, gap='large')
 
+        with timer.stage('overall_metrics'):
+            metricas_gerais = memo('overall_metrics', filtros, lambda: deliverer_overview(pedidos()))
+
         with col1:
-            maior = df1['Delivery_person_Age'].max()
-            col1.metric('Maior idade', maior)
+            col1.metric('Maior idade', metricas_gerais['max_age'])
 
         with col2:
-            menor = df1['Delivery_person_Age'].min()
-            col2.metric('Menor idade', menor)
+            col2.metric('Menor idade', metricas_gerais['min_age'])
 
         with col3:
-            melhor = df1['Vehicle_condition'].max()
-            col3.metric('Melhor Condição', melhor)
+            col3.metric('Melhor Condição', metricas_gerais['best_vehicle_condition'])
 
         with col4:
-            pior = df1['Vehicle_condition'].min()
-            col4.metric('Pior Condição', pior)
+            col4.metric('Pior Condição', metricas_gerais['worst_vehicle_condition'])
 
     # Avaliações
     with st.container():
         st.markdown("""---""")
         st.title('Avaliações')
 
+        with timer.stage('ratings'):
+            df_transito, df_clima = memo('ratings', filtros, lambda: (rating_by(pedidos(), 'Road_traffic_density'),
+                                                                rating_by(pedidos(), 'Weatherconditions')))
+
+        # Tabela de entregadores pré-calculada por filtro (compartilhada entre as sessões)
+        with timer.stage('deliverer_stats'):
+            stats = load_deliverer_stats(df1, date_slider,
+                                         Road_traffic_density=traffic_options,
+                                         Weatherconditions=conditions_options)
+
         col1, col2 = st.columns(2)
         with col1:
             st.markdown('##### Avaliação média por Entregador')
-            st.dataframe(df1.groupby(['Delivery_person_ID'])['Delivery_person_Ratings'].mean().reset_index(), height=455)
+            deliverer_table_section(stats)
         
         with col2:
             st.markdown('##### Avaliação média por Trânsito')
-            st.dataframe(df1.groupby('Road_traffic_density').agg(Delivery_mean=('Delivery_person_Ratings', 'mean'), 
-                                        Delivery_STD=('Delivery_person_Ratings', 'std')).reset_index())
+            with timer.stage('ratings_by_traffic:dataframe'):
+                dataframe(df_transito, timer, 'ratings_by_traffic')
             
             st.markdown('##### Avaliação média por Clima')
-            st.dataframe(df1.groupby(['Weatherconditions']).agg(Delivery_mean=('Delivery_person_Ratings', 'mean'), 
-                                       Delivery_STD=('Delivery_person_Ratings', 'std')).reset_index())
+            with timer.stage('ratings_by_weather:dataframe'):
+                dataframe(df_clima, timer, 'ratings_by_weather')
 
     # Entregadores TOP
     with st.container():
         st.markdown("""---""")
         st.title('Velocidade de Entrega')
+        ranking_section(pedidos, filtros)
 
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown('##### Top Entregadores mais Rápidos')
-            df3 = top_delivers(df1, top_asc=True)
-            st.dataframe(df3)
-
-        with col2:
-            st.markdown('##### Top Entregadores mais Lentos')
-            df3 = top_delivers(df1, top_asc=False)
-            st.dataframe(df3)
+# Tempos desta execução (somente com a instrumentação ligada)
+timer.report()
@@ -1,105 +1,34 @@
 # Libraries / Bibliotecas
-import pandas as pd
+import functools
 import plotly.express as px
 import plotly.graph_objects as go
-from haversine import haversine
 import streamlit as st
 from datetime import datetime
-from PIL import Image
-import folium
-from streamlit_folium import folium_static
+from utils.analytics import delivery_overview, time_by
+from utils.assets import load_logo
+from utils.bitmaps import load_bitmap_index
+from utils.charts import dataframe, plotly_chart
+from utils.data_loader import current_version, load_data
+from utils.filters import filter_orders
+from utils.geo import mean_distance_by
+from utils.sketches import load_time_sketches
+from utils.spatial import geo_filter_widget
+from utils.profiling import RerunTimer
+from utils.sections import memo, section, state_key
+from utils.warmup import start_warmup
 import numpy as np
 
 # =========================
 # Functions / Funções
 #==========================
-def clean_code(df1):
-    """ Esta função tem a responsabilidade de limpar o dataframe
-
-        Tipos de limpeza:
-        1. Remoção dos dados NaN
-        2. Mudaça do tipo da coluna de dados
-        3. Remoção dos espaços das variáveis de texto
-        4. Formatação da coluna de datas
-        5. Limpeza da coluna de tempo (Remoção do texto da variável numérica)
-
-        Imput: Dataframe
-        Output: Dataframe    
-    """
-    # Filtrar linhas onde 'Delivery_person_Age' não é NaN
-    selected_lines = (df1['Delivery_person_Age'] != 'NaN ')
-    df1 = df1.loc[selected_lines, :].copy()
-
-    # 1. Convertendo a coluna Age de texto para número
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype('int')
-
-    # 2. Convertendo a coluna Rating de texto para número decimal (float)
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype('float')
-
-    # 3. Convertendo a coluna Date de texto para Datetime
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-
-    # 4. Convertendo a coluna Multiple Delivery para Int
-    selected_lines = df1['multiple_deliveries'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype('int')
-
-    # 5. Removendo NaN das colunas
-    selected_lines = df1['Road_traffic_density'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['City'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['Type_of_vehicle'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    selected_lines = df1['Festival'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    # 6. Removendo espaços dentro de strings
-    df1 = df1.reset_index(drop=True)
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Delivery_person_ID'] = df1.loc[:, 'Delivery_person_ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-
-    # 7. Limpando a coluna 'Time_taken(min)'
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-    return df1
-
-def distance(df1, fig):
-    if fig == False:
-        mean_distance = df1['Distance'] = df1[['Restaurant_latitude', 
-                'Restaurant_longitude', 
-                'Delivery_location_latitude', 
-                'Delivery_location_longitude']].apply(lambda x: haversine(
-                    (x['Restaurant_latitude'], 
-                        x['Restaurant_longitude']), 
-                        (x['Delivery_location_latitude'], 
-                        x['Delivery_location_longitude'])), axis=1)
-        mean_distance = np.round(df1['Distance'].mean(), 2)
-        return mean_distance
-    else:
-        df1['Distance'] = df1[['Restaurant_latitude', 
-                        'Restaurant_longitude', 
-                        'Delivery_location_latitude', 
-                        'Delivery_location_longitude']].apply(lambda x: haversine(
-                            (x['Restaurant_latitude'], 
-                            x['Restaurant_longitude']), 
-                            (x['Delivery_location_latitude'], 
-                                x['Delivery_location_longitude'])), axis=1)
-
-        mean_distance = df1.groupby('City')['Distance'].mean().reset_index()
-        fig = go.Figure(data=[go.Pie(labels=mean_distance['City'], values=mean_distance['Distance'], pull=[0, 0.1, 0])])
-        return fig
+def distance(df1):
+    # A coluna 'Distance' já vem calculada do carregamento dos dados
+    mean_distance = mean_distance_by(df1, 'City')
+    fig = go.Figure(data=[go.Pie(labels=mean_distance['City'], values=mean_distance['Distance'], pull=[0, 0.1, 0])])
+    return fig
 
 def avg_std_time_graph(df1):
-    st.markdown('##### Tempo Médio de Entrega por Cidade')
-    df_aux = df1.groupby('City')[['Time_taken(min)']].agg(Tempo_medio=('Time_taken(min)', 'mean'), 
-                                                Desvio_padrao=('Time_taken(min)', 'std')).reset_index()
+    df_aux = time_by(df1, 'City')
 
     fig = go.Figure()
     fig.add_trace(go.Bar(name='Control',
@@ -111,23 +40,54 @@ def avg_std_time_graph(df1):
     return fig
 
 def avg_std_time_on_traffic(df1):
-    df_aux = df1.groupby(['City', 'Road_traffic_density'])[['Time_taken(min)']].agg(Tempo_medio=('Time_taken(min)', 'mean'),
-                                                            Desvio_padrao=('Time_taken(min)', 'std')).reset_index()
+    df_aux = time_by(df1, ['City', 'Road_traffic_density'])
+    # O px.sunburst agrupa o caminho com observed=False: categorias sem pedidos
+    # (ex.: cidades fora do filtro geográfico) virariam pais com peso zero
+    df_aux[['City', 'Road_traffic_density']] = df_aux[['City', 'Road_traffic_density']].astype(str)
 
+    # Grupos com um só pedido não têm desvio padrão (NaN): ficam fora do ponto médio
+    midpoint = df_aux['Desvio_padrao'].mean()
     fig = px.sunburst(df_aux, path=['City', 'Road_traffic_density'], values='Tempo_medio',
                     color='Desvio_padrao', color_continuous_scale='RdBu',
-                    color_continuous_midpoint=np.average(df_aux['Desvio_padrao']))
+                    color_continuous_midpoint=None if np.isnan(midpoint) else midpoint)
     return fig
 
+@section
+def percentiles_section(sketches, date_slider, traffic_options, conditions_options):
+    # Fragmento: trocar o agrupamento não reexecuta o resto da página
+    # Combina os sketches das células do filtro; o filtro geográfico não se aplica aqui
+    with timer.stage('sketches_mask'):
+        celulas_selecionadas = sketches.mask(date_slider,
+                                             Road_traffic_density=traffic_options,
+                                             Weatherconditions=conditions_options)
+    agrupar_por = st.multiselect('Agrupar por',
+                                 ['City', 'Road_traffic_density', 'Type_of_order', 'Festival'],
+                                 default=['City'])
+    with timer.stage('time_quantiles:dataframe'):
+        dataframe(sketches.quantiles(celulas_selecionadas, by=agrupar_por or None), timer, 'time_quantiles', use_container_width=True)
+    return None
+
 # ========================================================================================================
 # ==================================== Inicio da Estrutura lógica do código ==============================
 # ========================================================================================================
 
-# Read DataFrame / Lendo DataFrame
-df = pd.read_csv('dataset/train.csv')
+# Instrumentação opcional (CURRY_PROFILE=1 ou ?profile=1)
+timer = RerunTimer('visao_restaurante')
+
+# Prepara cubo, índices e bibliotecas em segundo plano (uma vez por processo)
+start_warmup()
+
+# Colunas usadas nesta página (as demais não são carregadas)
+COLUMNS = ['Delivery_person_ID', 'Distance', 'Order_Date',
+           'Road_traffic_density', 'Weatherconditions', 'Type_of_order', 'Festival', 'City', 'Time_taken(min)']
 
-# Cleaning DataFrame / Limpando DataFrame
-df1 = clean_code(df)
+# Read and clean DataFrame / Lendo e limpando DataFrame (cache compartilhado)
+with timer.stage('load_data'):
+    df1 = load_data(columns=COLUMNS)
+
+# Delivery time sketches / Sketches do tempo de entrega (percentis)
+with timer.stage('load_time_sketches'):
+    sketches = load_time_sketches()
 
 # =========================
 #  Sidebar / Barra Lateral
@@ -135,8 +95,7 @@ df1 = clean_code(df)
 st.header('Marketplace - Visão Restaurantes')
 
 #image_path = r'C:\Users\Andre\Desktop\Comunidade DS\FTC Analisando dados com Python\logo.jpg'
-image = Image.open('logo.jpg')
-st.sidebar.image(image, width=120)
+st.sidebar.image(load_logo(), width=120)
 
 st.sidebar.markdown('# Cury Company')
 st.sidebar.markdown('## Fastest Delivery in Town')
@@ -159,23 +118,28 @@ traffic_options = st.sidebar.multiselect(
 
 conditions_options = st.sidebar.multiselect(
     'Quais as condições de clima',
-    ['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms', 'conditions Stormy', 'conditions Sunny', 'conditions Sunny'],
-    default=['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms', 'conditions Stormy', 'conditions Sunny', 'conditions Sunny'])
+    ['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms', 'conditions Stormy', 'conditions Sunny'],
+    default=['conditions Cloudy', 'conditions Fog', 'conditions Sandstorms', 'conditions Stormy', 'conditions Sunny'])
 
 st.sidebar.markdown('''---''')
-st.sidebar.markdown('### Powered by Comunidade DS')
 
-# Filtro de data
-linhas_selecionadas = df1['Order_Date'] < date_slider
-df1 = df1.loc[linhas_selecionadas, :]
+# Filtro geográfico (drill-down por raio ou área)
+posicoes = geo_filter_widget()
 
-# Filtro de Transito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas, :]
+st.sidebar.markdown('''---''')
+st.sidebar.markdown('### Powered by Comunidade DS')
 
-# Filtro de Condições Climáticas
-linhas_selecionadas = df1['Weatherconditions'].isin(conditions_options)
-df1 = df1.loc[linhas_selecionadas, :]
+# Estado dos filtros que alimentam as seções (página, versão do dataset e sidebar),
+# também usado como chave do cache de resultados compartilhado entre as sessões
+filtros = state_key('visao_restaurante', current_version(), date_slider, traffic_options, conditions_options, posicoes)
+
+# Filtros geográfico, de data, trânsito e clima (aplicados só se alguma seção recalcular)
+@functools.cache
+def pedidos():
+    with timer.stage('filter_orders'):
+        return filter_orders(df1, date_slider, index=load_bitmap_index(), positions=posicoes,
+                             Road_traffic_density=traffic_options,
+                             Weatherconditions=conditions_options)
 
 # =========================
 #    Layout Streamlit
@@ -184,57 +148,78 @@ df1 = df1.loc[linhas_selecionadas, :]
 
 tab1, tab2, tab3 = st.tabs(['Visao Gerencial', '_', '_'])
 
+# Filtros muito restritos (ex.: raio pequeno) podem não deixar nenhum pedido
+with timer.stage('total_pedidos'):
+    total_pedidos = memo('total_pedidos', filtros, lambda: len(pedidos()))
+
 with tab1:
-    with st.container():
-        st.title('Overall Metrics')
-        col1, col2, col3, col4, col5, col6 = st.columns(6)
+    if total_pedidos == 0:
+        st.info(f'O filtro selecionou {total_pedidos} pedido(s): amplie os filtros para ver as métricas e os gráficos.')
+    else:
+        with st.container():
+            st.title('Overall Metrics')
+            col1, col2, col3, col4, col5, col6 = st.columns(6)
 
-        with col1:
-            qtd_entregadores = df1['Delivery_person_ID'].nunique()
-            col1.metric('Entregadores únicos', qtd_entregadores)
+            with timer.stage('overall_metrics'):
+                metricas_gerais = memo('overall_metrics', filtros, lambda: delivery_overview(pedidos()))
 
-        with col2:
-            mean_distance = distance(df1, fig=False)
-            col2.metric('A distância média', mean_distance)            
+            with col1:
+                col1.metric('Entregadores únicos', metricas_gerais['deliverers'])
 
-        with col3:
-            medio = np.round(df1[df1['Festival'] == 'Yes']['Time_taken(min)'].mean())
-            col3.metric('Tempo médio de Entrega c/ Festival', medio)
+            with col2:
+                col2.metric('A distância média', metricas_gerais['mean_distance'])            
 
-        with col4:
-            medio = np.round(df1[df1['Festival'] == 'Yes']['Time_taken(min)'].std())
-            col4.metric('Desvio padrão médio de Entrega c/ Festival', medio)
+            with col3:
+                col3.metric('Tempo médio de Entrega c/ Festival', metricas_gerais['festival_time_mean'])
 
-        with col5:
-            medio = np.round(df1[df1['Festival'] == 'No']['Time_taken(min)'].mean())
-            col5.metric('Tempo médio de Entrega s/ Festival', medio)
+            with col4:
+                col4.metric('Desvio padrão médio de Entrega c/ Festival', metricas_gerais['festival_time_std'])
 
-        with col6:
-            medio = np.round(df1[df1['Festival'] == 'No']['Time_taken(min)'].std())
-            col6.metric('Desvio padrão médio de Entrega s/ Festival', medio)
+            with col5:
+                col5.metric('Tempo médio de Entrega s/ Festival', metricas_gerais['no_festival_time_mean'])
 
-    with st.container():
-        st.markdown("""---""")
-        col1, col2 = st.columns(2)
+            with col6:
+                col6.metric('Desvio padrão médio de Entrega s/ Festival', metricas_gerais['no_festival_time_std'])
 
-        with col1:
-            fig = avg_std_time_graph(df1)
-            st.plotly_chart(fig, use_container_width=True)
+        with st.container():
+            st.markdown("""---""")
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.markdown('##### Tempo Médio de Entrega por Cidade')
+                with timer.stage('avg_std_time_graph'):
+                    fig = memo('avg_std_time_graph', filtros, lambda: avg_std_time_graph(pedidos()))
+                with timer.stage('avg_std_time_graph:plotly_chart'):
+                    plotly_chart(fig, timer, 'avg_std_time_graph', use_container_width=True)
         
-        with col2:
-            st.markdown('##### O tempo médio e o desvio padrão de entrega por cidade e tipo de pedido')
-            st.dataframe(df1.groupby(['City', 'Type_of_order'])[['Time_taken(min)']].agg(Tempo_medio=('Time_taken(min)', 'mean'),
-                                                                Desvio_padrao=('Time_taken(min)', 'std')).reset_index(), use_container_width=True)
+            with col2:
+                st.markdown('##### O tempo médio e o desvio padrão de entrega por cidade e tipo de pedido')
+                with timer.stage('time_by_city_order'):
+                    df_aux = memo('time_by_city_order', filtros, lambda: time_by(pedidos(), ['City', 'Type_of_order']))
+                with timer.stage('time_by_city_order:dataframe'):
+                    dataframe(df_aux, timer, 'time_by_city_order', use_container_width=True)
+
+        with st.container():
+            st.markdown("""---""")
+            st.title('Distribuição do Tempo')
+            col1, col2 = st.columns(2)
+
+            with col1:
+                with timer.stage('distance'):
+                    fig = memo('distance', filtros, lambda: distance(pedidos()))
+                with timer.stage('distance:plotly_chart'):
+                    plotly_chart(fig, timer, 'distance', use_container_width=True)
+
+            with col2:
+                with timer.stage('avg_std_time_on_traffic'):
+                    fig = memo('avg_std_time_on_traffic', filtros, lambda: avg_std_time_on_traffic(pedidos()))
+                with timer.stage('avg_std_time_on_traffic:plotly_chart'):
+                    plotly_chart(fig, timer, 'avg_std_time_on_traffic', use_container_width=True)
 
     with st.container():
         st.markdown("""---""")
-        st.title('Distribuição do Tempo')
-        col1, col2 = st.columns(2)
-
-        with col1:
-            fig = distance(df1, fig=True)
-            st.plotly_chart(fig, use_container_width=True)
+        st.title('Percentis do Tempo de Entrega')
+        percentiles_section(sketches, date_slider, traffic_options, conditions_options)
 
-        with col2:
-            fig = avg_std_time_on_traffic(df1)
-            st.plotly_chart(fig, use_container_width=True)
+# Tempos desta execução (somente com a instrumentação ligada)
+timer.report()
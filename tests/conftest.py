@@ -0,0 +1,41 @@
+# Libraries / Bibliotecas
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# As páginas leem o CSV de CURRY_DATASET na importação de utils/: definido antes de qualquer teste
+DATA_DIR = tempfile.mkdtemp(prefix='curry_tests_')
+os.environ['CURRY_DATASET'] = os.path.join(DATA_DIR, 'train.csv')
+os.environ['CURRY_WARMUP'] = '0'
+
+TEST_ROWS = 5_000
+
+# =========================
+# Fixtures
+#==========================
+@pytest.fixture(scope='session')
+def dataset():
+    """ CSV sintético (ver benchmarks/synthetic.py) lido pelas páginas nos testes """
+    from benchmarks.synthetic import write_synthetic_csv
+
+    path = os.environ['CURRY_DATASET']
+    if not os.path.exists(path):
+        write_synthetic_csv(path, TEST_ROWS, 0)
+    return path
+
+@pytest.fixture
+def app(dataset, monkeypatch):
+    """ Abre uma página com o AppTest, a partir da raiz do repositório (logo.jpg, pages/) """
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.chdir(ROOT)
+
+    def run(page, timeout=120):
+        at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=timeout)
+        return at.run()
+    return run
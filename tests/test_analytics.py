@@ -0,0 +1,20 @@
+# Libraries / Bibliotecas
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+# Módulos usados fora do app (linha de comando, processos do relatório)
+HEADLESS_MODULES = ['utils.analytics', 'utils.ingest', 'utils.streaming']
+
+# =========================
+# Functions / Funções
+#==========================
+@pytest.mark.parametrize('module', HEADLESS_MODULES)
+def test_headless_module_does_not_import_streamlit(module):
+    # Processo novo: no processo dos testes o Streamlit já foi importado pelas páginas
+    code = f"import sys, {module}; sys.exit('streamlit' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr or f'{module} importou o streamlit'
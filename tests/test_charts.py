@@ -0,0 +1,21 @@
+# Libraries / Bibliotecas
+import pandas as pd
+
+from utils.charts import fit_time_series
+from utils.timebuckets import bucket_start, calendar_columns
+
+# =========================
+# Functions / Funções
+#==========================
+def test_fit_time_series_weeks_match_iso_weeks():
+    # Seis anos de dias não cabem em 400 pontos: a série é somada por semana
+    dates = pd.Series(pd.date_range('2018-01-03', '2023-12-31', freq='D'))
+    df = pd.DataFrame({'period': dates, 'orders': 1})
+
+    df_aux = fit_time_series(df, 'period', 'orders', budget=400)
+
+    weeks = bucket_start(calendar_columns(dates)['Order_Week'], 'week')
+    expected = df.groupby(weeks)['orders'].sum()
+    assert (df_aux['period'].dt.dayofweek == 0).all()
+    assert df_aux['period'].tolist() == expected.index.tolist()
+    assert df_aux['orders'].tolist() == expected.tolist()
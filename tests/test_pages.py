@@ -0,0 +1,37 @@
+# Libraries / Bibliotecas
+from benchmarks.synthetic import CITIES
+
+RADII_KM = [1, 2, 5, 10, 20, 50]
+
+# =========================
+# Functions / Funções
+#==========================
+def widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+def test_restaurant_page_radius_filter_leaving_out_cities(app):
+    at = app('pages/3_visao_restaurante.py')
+    assert not at.exception
+    widget(at.sidebar.radio, 'Filtrar pedidos por').set_value('Raio').run()
+
+    # Menor raio que seleciona algum pedido: poucos pedidos, de poucas cidades
+    for radius in RADII_KM:
+        widget(at.sidebar.slider, 'Raio (km)').set_value(radius).run()
+        assert not at.exception, [e.value for e in at.exception]
+        if not at.info:
+            break
+    assert not at.info
+
+    df_aux = next(df.value for df in at.dataframe if 'Type_of_order' in df.value.columns)
+    # Os valores do CSV sintético têm o espaço final que a limpeza remove
+    assert set(df_aux['City']) < {city.strip() for city in CITIES}
+    # Tempo por cidade, distância por cidade e o sunburst por cidade e trânsito
+    assert len(at.get('plotly_chart')) == 3
+
+def test_restaurant_page_radius_filter_without_orders(app):
+    at = app('pages/3_visao_restaurante.py')
+    widget(at.sidebar.radio, 'Filtrar pedidos por').set_value('Raio').run()
+    widget(at.sidebar.number_input, 'Latitude do centro').set_value(0.0).run()
+
+    assert not at.exception
+    assert 'O filtro selecionou 0 pedido(s)' in at.info[0].value
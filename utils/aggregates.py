@@ -0,0 +1,89 @@
+# Libraries / Bibliotecas
+import numpy as np
+import pandas as pd
+
+# =========================
+# Functions / Funções
+#==========================
+def plain_values(df_aux):
+    """ Colunas categóricas viram valores simples (o tipo das categorias)
+
+        Resultados de groupby entregues a gráficos e relatórios: o Plotly
+        agrupa colunas categóricas com observed=False, então categorias sem
+        linhas virariam grupos vazios (ex.: pais com peso zero no sunburst).
+
+        Imput: Dataframe
+        Output: Dataframe
+    """
+    categorical = {col: df_aux[col].cat.categories.dtype for col in df_aux.columns
+                   if isinstance(df_aux[col].dtype, pd.CategoricalDtype)}
+    return df_aux.astype(categorical) if categorical else df_aux
+
+def summarize(df1, keys, value_cols=()):
+    """ Estatísticas combináveis por grupo
+
+        Para cada coluna de valor guarda contagem, média, M2 (soma dos
+        quadrados dos desvios), mínimo e máximo. Dois resumos podem ser
+        combinados com merge_summaries sem voltar às linhas originais.
+
+        Imput: Dataframe, coluna(s) de agrupamento, colunas de valor
+        Output: Dataframe indexado pelas chaves, com a coluna 'orders'
+    """
+    groups = df1.groupby(keys, observed=True)
+    summary = groups.size().rename('orders').to_frame()
+
+    for col in value_cols:
+        stats = groups[col].agg(['count', 'mean', 'min', 'max'])
+        stats['m2'] = (groups[col].var(ddof=0) * stats['count']).fillna(0.0)
+        stats.columns = [f'{col}_{stat}' for stat in stats.columns]
+        summary = summary.join(stats)
+
+    # Chaves categóricas viram valores simples, para que resumos de pedaços
+    # com categorias diferentes possam ser combinados
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    return plain_values(summary.reset_index()).set_index(keys)
+
+def merge_summaries(summary1, summary2, value_cols=()):
+    """ Combina dois resumos gerados por summarize (fórmula de Chan/Welford)
+
+        Imput: dois resumos com as mesmas chaves e colunas de valor
+        Output: resumo combinado
+    """
+    index = summary1.index.union(summary2.index)
+    a = summary1.reindex(index)
+    b = summary2.reindex(index)
+
+    merged = pd.DataFrame(index=index)
+    merged['orders'] = a['orders'].fillna(0).astype('int64') + b['orders'].fillna(0).astype('int64')
+
+    for col in value_cols:
+        n_a = a[f'{col}_count'].fillna(0).to_numpy(dtype='float64')
+        n_b = b[f'{col}_count'].fillna(0).to_numpy(dtype='float64')
+        mean_a = a[f'{col}_mean'].fillna(0).to_numpy(dtype='float64')
+        mean_b = b[f'{col}_mean'].fillna(0).to_numpy(dtype='float64')
+        m2_a = a[f'{col}_m2'].fillna(0).to_numpy(dtype='float64')
+        m2_b = b[f'{col}_m2'].fillna(0).to_numpy(dtype='float64')
+
+        n = n_a + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean_b - mean_a
+            mean = np.where(n > 0, mean_a + delta * n_b / n, np.nan)
+            m2 = np.where(n > 0, m2_a + m2_b + delta ** 2 * n_a * n_b / n, 0.0)
+
+        merged[f'{col}_count'] = n.astype('int64')
+        merged[f'{col}_mean'] = mean
+        merged[f'{col}_min'] = np.fmin(a[f'{col}_min'].to_numpy(dtype='float64'), b[f'{col}_min'].to_numpy(dtype='float64'))
+        merged[f'{col}_max'] = np.fmax(a[f'{col}_max'].to_numpy(dtype='float64'), b[f'{col}_max'].to_numpy(dtype='float64'))
+        merged[f'{col}_m2'] = m2
+
+    return merged
+
+def describe_summary(summary, col):
+    """ Média e desvio padrão (amostral, como o .std() do pandas) de um resumo
+
+        Imput: resumo, coluna de valor
+        Output: Dataframe com as colunas 'mean' e 'std'
+    """
+    n = summary[f'{col}_count']
+    std = np.sqrt(summary[f'{col}_m2'] / (n - 1)).where(n > 1)
+    return pd.DataFrame({'mean': summary[f'{col}_mean'], 'std': std})
@@ -0,0 +1,281 @@
+# Libraries / Bibliotecas
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import plain_values
+from utils.bitmaps import BITMAP_COLUMNS, BitmapIndex
+from utils.data_loader import (DATASET_PATH, build_snapshot, current_version, dataset_version,
+                               read_dataset, snapshot_path_for, snapshot_version)
+from utils.filters import filter_orders
+from utils.geo import mean_distance_by
+from utils.ranking import rank_deliverers
+from utils.timebuckets import time_rollup
+
+# Cálculo dos KPIs das páginas sem Streamlit: as páginas desenham os
+# resultados e a linha de comando abaixo grava relatórios (Parquet/JSON).
+
+# Colunas necessárias para calcular todos os KPIs
+ANALYTICS_COLUMNS = ['Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings',
+                     'Order_Date', 'Week_of_year', 'Order_Week', 'Order_Month',
+                     'Weatherconditions', 'Road_traffic_density', 'Vehicle_condition',
+                     'Type_of_order', 'Festival', 'City', 'Time_taken(min)', 'Distance']
+
+# Nomes curtos aceitos nas fatias da linha de comando
+SLICE_COLUMNS = {
+    'city': 'City',
+    'traffic': 'Road_traffic_density',
+    'weather': 'Weatherconditions',
+    'festival': 'Festival',
+}
+
+REPORTS_DIR = 'reports'
+
+# =========================
+# Functions / Funções
+#==========================
+# Os resultados por grupo saem com chaves simples (ver plain_values): vão direto para os gráficos
+def orders_by(df1, keys):
+    """ Quantidade de pedidos por grupo """
+    return plain_values(df1.groupby(keys, observed=True).size().rename('orders').reset_index())
+
+def orders_by_day(df1):
+    return orders_by(df1, 'Order_Date')
+
+def traffic_order_share(df1):
+    df_aux = orders_by(df1, 'Road_traffic_density')
+    df_aux['Entregas_percent'] = df_aux['orders'] / df_aux['orders'].sum()
+    return df_aux
+
+def traffic_order_city(df1):
+    return orders_by(df1, ['City', 'Road_traffic_density'])
+
+def orders_by_week(df1):
+    return orders_by(df1, 'Week_of_year')
+
+def order_share_by_week(df1):
+    """ Pedidos por entregador único em cada semana (contagem exata) """
+    df_aux = plain_values(df1.groupby('Week_of_year', observed=True)
+                             .agg(orders=('Delivery_person_ID', 'size'), deliverers=('Delivery_person_ID', 'nunique'))
+                             .reset_index())
+    df_aux['Order_by_deliver'] = df_aux['orders'] / df_aux['deliverers']
+    return df_aux
+
+def time_by(df1, keys):
+    """ Tempo médio e desvio padrão de entrega por grupo """
+    return plain_values(df1.groupby(keys, observed=True)[['Time_taken(min)']]
+                           .agg(Tempo_medio=('Time_taken(min)', 'mean'), Desvio_padrao=('Time_taken(min)', 'std'))
+                           .reset_index())
+
+def rating_by(df1, keys):
+    """ Avaliação média e desvio padrão por grupo """
+    return plain_values(df1.groupby(keys, observed=True)
+                           .agg(Delivery_mean=('Delivery_person_Ratings', 'mean'), Delivery_STD=('Delivery_person_Ratings', 'std'))
+                           .reset_index())
+
+def _condition_mask(column, value):
+    """ Máscara booleana de column == value (comparando os códigos, se categórica) """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = column.cat.categories
+        if value not in categories:
+            return np.zeros(len(column), dtype=bool)
+        return column.cat.codes.to_numpy() == categories.get_loc(value)
+    return (column == value).to_numpy()
+
+def run_metrics(df1, spec):
+    """ Calcula um conjunto de métricas declaradas compartilhando máscaras e recortes
+
+        Cada condição distinta (ex.: Festival == 'Yes') vira uma máscara uma
+        única vez e cada par (coluna, condição) é recortado uma única vez;
+        todas as agregações desse par (média, desvio padrão, máximo, ...) usam
+        o mesmo recorte.
+
+        Imput: Dataframe, especificação {nome: (coluna, agregação, condição, casas decimais)},
+               com condição = (coluna, valor) ou None e casas decimais = int ou None
+        Output: dicionário nome -> valor
+    """
+    masks = {}
+    subsets = {}
+    computed = {}
+    results = {}
+    for name, (col, agg, condition, decimals) in spec.items():
+        if (col, agg, condition) not in computed:
+            if (col, condition) not in subsets:
+                column = df1[col]
+                if condition is not None:
+                    if condition not in masks:
+                        masks[condition] = _condition_mask(df1[condition[0]], condition[1])
+                    column = column[masks[condition]]
+                subsets[(col, condition)] = column
+            computed[(col, agg, condition)] = getattr(subsets[(col, condition)], agg)()
+
+        value = computed[(col, agg, condition)]
+        if decimals is not None:
+            value = round(float(value), decimals) if decimals else np.round(value)
+        results[name] = value
+    return results
+
+# Cartões 'Overall Metrics': nome -> (coluna, agregação, condição, casas decimais)
+DELIVERER_OVERVIEW = {
+    'max_age': ('Delivery_person_Age', 'max', None, None),
+    'min_age': ('Delivery_person_Age', 'min', None, None),
+    'best_vehicle_condition': ('Vehicle_condition', 'max', None, None),
+    'worst_vehicle_condition': ('Vehicle_condition', 'min', None, None),
+}
+
+DELIVERY_OVERVIEW = {
+    'deliverers': ('Delivery_person_ID', 'nunique', None, None),
+    'mean_distance': ('Distance', 'mean', None, 2),
+    'festival_time_mean': ('Time_taken(min)', 'mean', ('Festival', 'Yes'), 0),
+    'festival_time_std': ('Time_taken(min)', 'std', ('Festival', 'Yes'), 0),
+    'no_festival_time_mean': ('Time_taken(min)', 'mean', ('Festival', 'No'), 0),
+    'no_festival_time_std': ('Time_taken(min)', 'std', ('Festival', 'No'), 0),
+}
+
+def deliverer_overview(df1):
+    """ Idade dos entregadores e condição dos veículos (maior e menor) """
+    return run_metrics(df1, DELIVERER_OVERVIEW)
+
+def delivery_overview(df1):
+    """ Entregadores únicos, distância média e tempo de entrega com e sem festival """
+    return run_metrics(df1, DELIVERY_OVERVIEW)
+
+# KPIs do relatório: nome -> função (Dataframe filtrado -> Dataframe)
+KPIS = {
+    'deliverer_overview': lambda df1: pd.DataFrame([deliverer_overview(df1)]),
+    'delivery_overview': lambda df1: pd.DataFrame([delivery_overview(df1)]),
+    'orders_by_day': orders_by_day,
+    'traffic_order_share': traffic_order_share,
+    'traffic_order_city': traffic_order_city,
+    'orders_by_week': orders_by_week,
+    'orders_by_iso_week': lambda df1: time_rollup(df1, 'week'),
+    'orders_by_month': lambda df1: time_rollup(df1, 'month'),
+    'order_share_by_week': order_share_by_week,
+    'rating_by_traffic': lambda df1: rating_by(df1, 'Road_traffic_density'),
+    'rating_by_weather': lambda df1: rating_by(df1, 'Weatherconditions'),
+    'top_delivers_fastest': lambda df1: rank_deliverers(df1, k=10, metric='min')[0],
+    'top_delivers_slowest': lambda df1: rank_deliverers(df1, k=10, metric='min')[1],
+    'time_by_city': lambda df1: time_by(df1, 'City'),
+    'time_by_city_order': lambda df1: time_by(df1, ['City', 'Type_of_order']),
+    'time_by_city_traffic': lambda df1: time_by(df1, ['City', 'Road_traffic_density']),
+    'distance_by_city': lambda df1: mean_distance_by(df1, 'City'),
+}
+
+def compute_kpis(df1, kpis=None):
+    """ Calcula os KPIs pedidos (todos, por padrão) sobre um Dataframe já filtrado
+
+        Imput: Dataframe, lista de nomes de KPIS
+        Output: dicionário nome -> Dataframe
+    """
+    return {name: KPIS[name](df1) for name in (kpis or KPIS)}
+
+def parse_slice(text):
+    """ Converte 'city=Urban;traffic=Jam,High' em {'City': ['Urban'], 'Road_traffic_density': ['Jam', 'High']}
+
+        Texto vazio (ou 'all') é a fatia sem filtros.
+    """
+    filters = {}
+    if text.strip() in ('', 'all'):
+        return filters
+    for part in text.split(';'):
+        key, _, values = part.partition('=')
+        col = SLICE_COLUMNS.get(key.strip().lower(), key.strip())
+        filters[col] = [v.strip() for v in values.split(',') if v.strip()]
+    return filters
+
+def slice_name(filters):
+    """ Nome da fatia usado nos arquivos de saída (ex.: 'City=Urban__Road_traffic_density=High+Jam') """
+    if not filters:
+        return 'all'
+    name = '__'.join(f'{col}={"+".join(values)}' for col, values in filters.items())
+    return re.sub(r'[^\w=+.-]', '_', name)
+
+# Dataframe (e índice de bitmaps) de cada processo do pool, carregado uma vez pelo initializer
+_worker_df = None
+_worker_index = None
+
+def _init_worker(path):
+    global _worker_df, _worker_index
+    _worker_df = read_dataset(path, ANALYTICS_COLUMNS)
+    _worker_index = BitmapIndex(_worker_df, [col for col in BITMAP_COLUMNS if col in _worker_df])
+
+def _run_slice(start, end, filters, kpis):
+    df1 = filter_orders(_worker_df, end, start=start, index=_worker_index, **filters)
+    return compute_kpis(df1, kpis)
+
+def run_report(slices, start=None, end=None, path=DATASET_PATH, kpis=None, workers=None):
+    """ Calcula os KPIs de cada fatia em paralelo (um processo por núcleo, por padrão)
+
+        Cada processo lê o snapshot uma única vez (memory map) e recebe as
+        fatias a calcular.
+
+        Imput: lista de fatias (dicionários coluna -> valores), data inicial
+               (inclusiva), data final (exclusiva), caminho do CSV, KPIs, processos
+        Output: dicionário nome da fatia -> (nome do KPI -> Dataframe)
+    """
+    # O snapshot é regenerado aqui, e não em cada processo
+    if os.path.exists(path) and snapshot_version(snapshot_path_for(path)) != dataset_version(path):
+        build_snapshot(path)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+        futures = {slice_name(filters): pool.submit(_run_slice, start, end, filters, kpis) for filters in slices}
+        return {name: future.result() for name, future in futures.items()}
+
+def write_report(results, output_dir=REPORTS_DIR, fmt='parquet', meta=None):
+    """ Grava um arquivo por fatia e KPI (<fatia>/<kpi>.parquet ou .json) e um manifest.json
+
+        Imput: resultado de run_report, diretório, formato ('parquet' ou 'json'), metadados
+        Output: caminho do manifest
+    """
+    files = {}
+    for name, kpis in results.items():
+        slice_dir = os.path.join(output_dir, name)
+        os.makedirs(slice_dir, exist_ok=True)
+        files[name] = []
+        for kpi, df_aux in kpis.items():
+            # Colunas categóricas viram valores simples (lidos igual em qualquer ferramenta)
+            df_aux = plain_values(df_aux)
+            file_path = os.path.join(slice_dir, f'{kpi}.{fmt}')
+            if fmt == 'parquet':
+                df_aux.to_parquet(file_path, index=False)
+            else:
+                df_aux.to_json(file_path, orient='records', date_format='iso', indent=2)
+            files[name].append(os.path.relpath(file_path, output_dir))
+
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    with open(manifest_path, 'w') as f:
+        json.dump({**(meta or {}), 'files': files}, f, indent=2, default=str)
+    return manifest_path
+
+# ========================================================================================================
+# Relatório: python -m utils.analytics --start 2022-03-01 --slice 'city=Urban;traffic=Jam' --format json
+# ========================================================================================================
+if __name__ == '__main__':
+    import argparse
+    from datetime import datetime, timezone
+
+    parser = argparse.ArgumentParser(description='Calcula os KPIs do dashboard por fatia e grava Parquet/JSON')
+    parser.add_argument('--data', default=DATASET_PATH, help='caminho do train.csv')
+    parser.add_argument('--start', type=pd.Timestamp, default=None, help='data inicial (inclusiva), ex.: 2022-02-11')
+    parser.add_argument('--end', type=pd.Timestamp, default=None, help='data final (exclusiva), ex.: 2022-04-07')
+    parser.add_argument('--slice', dest='slices', action='append', default=None,
+                        help="fatia, ex.: 'city=Urban;traffic=Jam,High' (repetível; padrão: 'all')")
+    parser.add_argument('--kpi', dest='kpis', action='append', choices=list(KPIS), default=None)
+    parser.add_argument('--format', dest='fmt', choices=['parquet', 'json'], default='parquet')
+    parser.add_argument('--output', default=REPORTS_DIR)
+    parser.add_argument('--workers', type=int, default=None, help='processos (padrão: núcleos da máquina)')
+    args = parser.parse_args()
+
+    slices = [parse_slice(text) for text in (args.slices or ['all'])]
+    results = run_report(slices, args.start, args.end, args.data, args.kpis, args.workers)
+
+    meta = {'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'dataset_version': current_version(args.data),
+            'start': args.start, 'end': args.end,
+            'slices': {slice_name(filters): filters for filters in slices}}
+    manifest = write_report(results, args.output, args.fmt, meta)
+    print(f'{len(results)} fatias, {len(KPIS) if args.kpis is None else len(args.kpis)} KPIs; manifest em {manifest}')
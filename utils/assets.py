@@ -0,0 +1,39 @@
+# Libraries / Bibliotecas
+import io
+import os
+
+from PIL import Image
+
+from utils.data_loader import versioned_resource
+
+LOGO_PATH = 'logo.jpg'
+LOGO_WIDTH = 120
+
+# =========================
+# Functions / Funções
+#==========================
+def file_mtime(path):
+    """ Versão da imagem para o cache: muda quando o arquivo é alterado """
+    return os.stat(path).st_mtime_ns
+
+@versioned_resource(version=file_mtime, max_entries=4, show_spinner=False)
+def _load_logo(path, mtime_ns, width):
+    with Image.open(path) as image:
+        image = image.convert('RGB')
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), resample=Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+def load_logo(path=LOGO_PATH, width=LOGO_WIDTH):
+    """ Logo já reduzido para a largura exibida, em bytes JPEG, decodificado uma vez por processo
+
+        Passado ao st.image com a mesma largura, o Streamlit não precisa
+        redimensionar nem recodificar a imagem a cada rerun.
+
+        Imput: caminho da imagem, largura em pixels
+        Output: bytes
+    """
+    return _load_logo(path, width)
@@ -0,0 +1,103 @@
+# Libraries / Bibliotecas
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import ROW_ORDER_ATTR, load_data, versioned_resource
+
+# Colunas de categoria filtradas pela barra lateral (e pelas fatias dos relatórios)
+BITMAP_COLUMNS = ['Road_traffic_density', 'Weatherconditions', 'City', 'Festival',
+                  'Type_of_order', 'Type_of_vehicle']
+
+# =========================
+# Functions / Funções
+#==========================
+class BitmapIndex:
+    """ Índice de bitmaps por valor das colunas de categoria
+
+        Para cada valor de cada coluna guarda um bit por linha (np.packbits):
+        1 se a linha tem o valor. Uma escolha de multiselect vira um OU entre
+        os bitmaps dos valores escolhidos, e filtros de colunas diferentes um
+        E entre os resultados, sem comparar texto linha a linha.
+
+        As posições valem para o dataframe usado para montar o índice (e para
+        qualquer load_data da mesma versão dos dados, ver 'row_order').
+    """
+
+    def __init__(self, df1, columns=BITMAP_COLUMNS):
+        self.n_rows = len(df1)
+        # Ordem das linhas do dataframe de origem (ver read_dataset)
+        self.row_order = df1.attrs.get(ROW_ORDER_ATTR)
+        self.bitmaps = {}
+        self.positions = {}
+        self.complete = {}
+
+        for col in columns:
+            column = df1[col]
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                column = column.astype('category')
+            codes = column.cat.codes.to_numpy()
+
+            # Uma linha de bytes por valor: bitmaps[col][i] = linhas com o i-ésimo valor
+            bitmaps = np.zeros((len(column.cat.categories), (self.n_rows + 7) // 8), dtype='uint8')
+            for i in range(len(column.cat.categories)):
+                bitmaps[i] = np.packbits(codes == i)
+            self.bitmaps[col] = bitmaps
+            self.positions[col] = {value: i for i, value in enumerate(column.cat.categories)}
+            # Sem valores ausentes, escolher todos os valores equivale a não filtrar
+            self.complete[col] = bool((codes >= 0).all())
+
+    def __len__(self):
+        return self.n_rows
+
+    def __contains__(self, col):
+        return col in self.bitmaps
+
+    @property
+    def nbytes(self):
+        return sum(bitmap.nbytes for bitmap in self.bitmaps.values())
+
+    def _column_bits(self, col, values, b0, b1):
+        # OU entre os bitmaps dos valores escolhidos (valores desconhecidos não selecionam nada)
+        rows = sorted({self.positions[col][v] for v in values if v in self.positions[col]})
+        if self.complete[col] and len(rows) == len(self.positions[col]):
+            return None
+        if not rows:
+            return np.zeros(b1 - b0, dtype='uint8')
+
+        bits = self.bitmaps[col][rows[0], b0:b1].copy()
+        for row in rows[1:]:
+            np.bitwise_or(bits, self.bitmaps[col][row, b0:b1], out=bits)
+        return bits
+
+    def select(self, lo=0, hi=None, **filters):
+        """ Máscara booleana das linhas lo:hi que passam em todos os filtros
+
+            Só lê os bytes do intervalo pedido (ex.: o recorte de datas).
+
+            Ex.: index.select(0, 500, Road_traffic_density=['Low', 'Jam'], City=['Urban'])
+
+            Imput: posição inicial, posição final (exclusiva), listas de valores por coluna
+            Output: array booleano com hi - lo posições
+        """
+        hi = self.n_rows if hi is None else hi
+        b0, b1 = lo // 8, (hi + 7) // 8
+
+        selected = None
+        for col, values in filters.items():
+            bits = self._column_bits(col, values, b0, b1)
+            if bits is None:
+                continue
+            if selected is None:
+                selected = bits
+            else:
+                np.bitwise_and(selected, bits, out=selected)
+
+        if selected is None:
+            return np.ones(hi - lo, dtype=bool)
+        offset = lo - b0 * 8
+        return np.unpackbits(selected)[offset:offset + hi - lo].view(bool)
+
+@versioned_resource(max_entries=2, show_spinner='Montando índices dos filtros...')
+def load_bitmap_index(path, version):
+    """ Índice de bitmaps dos filtros compartilhado entre as sessões """
+    return BitmapIndex(load_data(path, columns=BITMAP_COLUMNS))
@@ -0,0 +1,140 @@
+# Libraries / Bibliotecas
+import numpy as np
+import pyarrow as pa
+import streamlit as st
+
+# Orçamento de pontos por série: acima dele a série é agregada em períodos
+# maiores (dia -> semana -> mês) ou reduzida por LTTB. Períodos rotulados pelo
+# início, como bucket_start: semanas ISO de segunda a domingo e meses do dia 1
+POINT_BUDGET = 1500
+TIME_BUCKETS = [('D', {}), ('W-MON', {'label': 'left', 'closed': 'left'}), ('MS', {})]
+
+# Traços de dispersão com mais pontos que isso são desenhados em WebGL
+WEBGL_THRESHOLD = 1000
+
+# Máximo de linhas enviadas ao navegador por tabela
+TABLE_ROW_BUDGET = 1000
+
+# =========================
+# Functions / Funções
+#==========================
+def lttb(x, y, n_out):
+    """ Largest-Triangle-Three-Buckets: escolhe n_out pontos que preservam a forma da série
+
+        Imput: x e y ordenados por x (datas são aceitas), número de pontos desejado
+        Output: array com as posições dos pontos escolhidos (sempre inclui o primeiro e o último)
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    x = x.astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets entre o primeiro e o último ponto
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges = np.append(edges, n)
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Média do próximo bucket (o último é o próprio ponto final)
+        avg_x = x[hi:edges[i + 2]].mean()
+        avg_y = y[hi:edges[i + 2]].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+def downsample(df, x, y, budget=POINT_BUDGET):
+    """ Reduz o Dataframe (ordenado por x) a no máximo 'budget' linhas com LTTB """
+    if len(df) <= budget:
+        return df
+    return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), budget)].reset_index(drop=True)
+
+def fit_time_series(df, x, y, budget=POINT_BUDGET, agg='sum'):
+    """ Ajusta uma série temporal ao orçamento de pontos
+
+        Valores aditivos (agg='sum', ex.: quantidade de pedidos) são somados no
+        menor período (dia, semana, mês) que cabe no orçamento. Os demais
+        (agg=None, ex.: razões) e o que ainda não couber são reduzidos por LTTB.
+
+        Imput: Dataframe com as colunas x (datas) e y, orçamento, agregação
+        Output: Dataframe com no máximo 'budget' linhas
+    """
+    if len(df) <= budget:
+        return df
+
+    if agg is not None:
+        serie = df.set_index(x)[y]
+        for freq, kwargs in TIME_BUCKETS:
+            df_aux = serie.resample(freq, **kwargs).agg(agg).reset_index()
+            if len(df_aux) <= budget:
+                return df_aux
+        df = df_aux
+
+    return downsample(df, x, y, budget)
+
+def use_webgl(fig, threshold=WEBGL_THRESHOLD):
+    """ Troca traços Scatter com mais de 'threshold' pontos por Scattergl """
+    import plotly.graph_objects as go
+
+    traces = []
+    changed = False
+    for trace in fig.data:
+        if trace.type == 'scatter' and trace.x is not None and len(trace.x) > threshold:
+            props = trace.to_plotly_json()
+            props.pop('type', None)
+            traces.append(go.Scattergl(props, skip_invalid=True))
+            changed = True
+        else:
+            traces.append(trace)
+
+    if changed:
+        fig = go.Figure(data=traces, layout=fig.layout)
+    return fig
+
+def figure_bytes(fig):
+    """ Tamanho em bytes do JSON da figura enviado ao navegador """
+    import plotly.io as pio
+
+    return len(pio.to_json(fig, validate=False).encode('utf-8'))
+
+def table_bytes(df):
+    """ Tamanho em bytes da tabela serializada em Arrow (formato usado pelo st.dataframe) """
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+def plotly_chart(fig, timer=None, name=None, **kwargs):
+    """ st.plotly_chart com traços WebGL para dispersões grandes
+
+        Com a instrumentação ligada, registra o tamanho do payload em timer.
+    """
+    fig = use_webgl(fig)
+    if timer is not None and timer.enabled:
+        timer.payload(name, figure_bytes(fig))
+    return st.plotly_chart(fig, **kwargs)
+
+def dataframe(df, timer=None, name=None, max_rows=TABLE_ROW_BUDGET, **kwargs):
+    """ st.dataframe limitado a 'max_rows' linhas
+
+        Com a instrumentação ligada, registra o tamanho do payload em timer.
+    """
+    total = len(df)
+    if total > max_rows:
+        df = df.iloc[:max_rows]
+    if timer is not None and timer.enabled:
+        timer.payload(name, table_bytes(df))
+
+    element = st.dataframe(df, **kwargs)
+    if total > max_rows:
+        st.caption(f'Mostrando {max_rows} de {total} linhas')
+    return element
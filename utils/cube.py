@@ -0,0 +1,173 @@
+# Libraries / Bibliotecas
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import plain_values
+from utils.data_loader import concat_frames, load_data, read_batches, versioned_resource
+from utils.timebuckets import GRANULARITIES, bucket_start, calendar_columns
+
+# Dimensões do cubo (um registro por combinação existente)
+CUBE_DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Weatherconditions', 'Festival']
+CUBE_COLUMNS = CUBE_DIMENSIONS + ['Delivery_person_ID']
+
+# Precisão do HyperLogLog: 2**10 registradores por célula (~3% de erro)
+HLL_PRECISION = 10
+
+# =========================
+# Functions / Funções
+#==========================
+def hll_registers(values, cells, n_cells, precision=HLL_PRECISION):
+    """ Monta os registradores HyperLogLog de cada célula do cubo
+
+        Imput: valores a contar (ex.: IDs dos entregadores), célula de cada valor,
+               número de células
+        Output: array (n_cells, 2**precision) de uint8
+    """
+    m = 1 << precision
+    hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+
+    # Os primeiros bits escolhem o registrador, o restante define o "rank"
+    index = (hashes >> np.uint64(64 - precision)).astype('int64')
+    rest = hashes & np.uint64((1 << (64 - precision)) - 1)
+    _, bit_length = np.frexp(rest.astype('float64'))
+    rank = np.clip(64 - precision - bit_length + 1, 1, None).astype('uint8')
+
+    # Máximo do rank por (célula, registrador)
+    key = cells.astype('int64') * m + index
+    best = pd.Series(rank).groupby(key).max()
+
+    registers = np.zeros(n_cells * m, dtype='uint8')
+    registers[best.index.to_numpy()] = best.to_numpy()
+    return registers.reshape(n_cells, m)
+
+def hll_estimate(registers):
+    """ Estimativa de valores distintos para cada linha de registradores
+
+        Imput: array (n, m) de registradores
+        Output: array (n,) com a estimativa de distintos
+    """
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype('float64')), axis=1)
+
+    # Correção para contagens pequenas (linear counting)
+    zeros = np.count_nonzero(registers == 0, axis=1)
+    small = (estimate <= 2.5 * m) & (zeros > 0)
+    estimate[small] = m * np.log(m / zeros[small])
+    return estimate
+
+def cell_mask(dims, date_limit=None, **filters):
+    """ Máscara das células de um cubo para a data limite (exclusiva) e os filtros
+
+        Imput: Dataframe das dimensões das células, data limite, listas de valores por coluna
+        Output: array booleano
+    """
+    selected = np.ones(len(dims), dtype=bool)
+    if date_limit is not None:
+        selected &= (dims['Order_Date'] < date_limit).to_numpy()
+    for col, values in filters.items():
+        selected &= dims[col].isin(values).to_numpy()
+    return selected
+
+def merge_cells(dims, by, values, ufunc):
+    """ Combina, com ufunc.reduceat, as linhas de 'values' das células de cada grupo
+
+        Os grupos saem na mesma ordem de dims.groupby(by, sort=True).
+
+        Imput: dimensões das células selecionadas, coluna(s) de agrupamento,
+               array com uma linha por célula, ufunc (ex.: np.maximum, np.add)
+        Output: array com uma linha por grupo
+    """
+    groups = dims.groupby(by, observed=True, sort=True).ngroup().to_numpy()
+    order = np.argsort(groups, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+    values = values[order]
+    return ufunc.reduceat(values, starts, axis=0) if len(order) else values
+
+class OrderCube:
+    """ Cubo pré-agregado de pedidos
+
+        Guarda, para cada combinação de dia x City x Road_traffic_density x
+        Weatherconditions x Festival, a quantidade de pedidos e um sketch
+        HyperLogLog dos entregadores. Os filtros e agrupamentos das páginas
+        são respondidos a partir do cubo, sem varrer os pedidos.
+    """
+
+    def __init__(self, df1, precision=HLL_PRECISION):
+        groups = df1.groupby(CUBE_DIMENSIONS, observed=True, sort=True)
+        cells = groups.ngroup().to_numpy()
+
+        self._set_cells(groups.size().rename('orders').reset_index(),
+                        hll_registers(df1['Delivery_person_ID'].to_numpy(), cells, groups.ngroups, precision))
+
+    def _set_cells(self, dims, registers):
+        # Colunas inteiras de calendário de cada célula (um dia por célula)
+        self.dims = dims.join(calendar_columns(dims['Order_Date']))
+        self.registers = registers
+
+    def merged(self, other):
+        """ Novo cubo com as células dos dois cubos (ex.: histórico + lote novo)
+
+            Células iguais somam os pedidos e combinam os sketches (máximo
+            por registrador), como se o cubo fosse montado com todos os pedidos.
+
+            Imput: outro OrderCube, de mesma precisão
+            Output: OrderCube
+        """
+        dims = concat_frames([self.dims[CUBE_DIMENSIONS + ['orders']], other.dims[CUBE_DIMENSIONS + ['orders']]])
+        registers = merge_cells(dims, CUBE_DIMENSIONS, np.concatenate([self.registers, other.registers]), np.maximum)
+
+        cube = OrderCube.__new__(OrderCube)
+        cube._set_cells(dims.groupby(CUBE_DIMENSIONS, observed=True, sort=True)['orders'].sum().reset_index(),
+                        registers)
+        return cube
+
+    def mask(self, date_limit=None, **filters):
+        """ Seleção de células: data limite (exclusiva) e listas de valores por dimensão
+
+            Ex.: cube.mask(date_slider, Road_traffic_density=traffic_options)
+        """
+        return cell_mask(self.dims, date_limit, **filters)
+
+    def rollup(self, selected, by, deliverers=False):
+        """ Agrega as células selecionadas pelas colunas 'by'
+
+            Imput: máscara de células, coluna(s) de agrupamento, se deve
+                   estimar os entregadores distintos
+            Output: Dataframe com 'orders' (e 'deliverers')
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        dims = self.dims.loc[selected, by + ['orders']]
+        df_aux = dims.groupby(by, observed=True, sort=True)['orders'].sum().reset_index()
+
+        if deliverers:
+            merged = merge_cells(dims, by, self.registers[selected], np.maximum)
+            df_aux['deliverers'] = hll_estimate(merged)
+
+        # Chaves simples para os gráficos (ver plain_values)
+        return plain_values(df_aux)
+
+    def time_rollup(self, selected, granularity='day', deliverers=False):
+        """ Pedidos (e entregadores únicos) por dia, semana ISO ou mês
+
+            Agrupa pelas chaves inteiras de calendário das células.
+
+            Imput: máscara das células (ver mask), granularidade (ver GRANULARITIES), se estima entregadores
+            Output: Dataframe com 'period' (início do período), 'orders' (e 'deliverers')
+        """
+        key = GRANULARITIES[granularity]
+        df_aux = self.rollup(selected, key, deliverers=deliverers)
+        df_aux.insert(0, 'period', bucket_start(df_aux.pop(key).to_numpy(), granularity))
+        return df_aux
+
+def extend_cube(cube, files):
+    """ Cubo com os pedidos de lotes novos somados, sem varrer o histórico """
+    return cube.merged(OrderCube(concat_frames(read_batches(files, CUBE_COLUMNS))))
+
+@versioned_resource(extend=extend_cube, max_entries=2, show_spinner='Montando cubo de pedidos...')
+def load_cube(path, version):
+    """ Cubo de pedidos compartilhado entre as sessões, refeito quando os dados mudam
+
+        Lotes anexados depois da última montagem só são somados (extend_cube).
+    """
+    return OrderCube(load_data(path, columns=CUBE_COLUMNS))
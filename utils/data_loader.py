@@ -0,0 +1,457 @@
+# Libraries / Bibliotecas
+import functools
+import json
+import os
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+
+from utils.geo import delivery_distance
+from utils.timebuckets import CALENDAR_COLUMNS, calendar_columns
+from utils.schema import CATEGORY_COLUMNS, NA_VALUES, NOT_NULL_COLUMNS, STRIP_COLUMNS, TIME_TAKEN_PREFIX, TRAIN_SCHEMA
+
+# CURRY_DATASET aponta as páginas para outro CSV (ex.: dados sintéticos do teste de carga)
+DATASET_PATH = os.environ.get('CURRY_DATASET', 'dataset/train.csv')
+
+# Incrementar sempre que clean_code() mudar as colunas geradas, para que
+# snapshots antigos sejam regenerados
+SNAPSHOT_FORMAT = 8
+
+# Uma única regeneração de snapshot/lote por vez no processo (páginas e aquecimento
+# pedem conjuntos de colunas diferentes e chegariam juntos a um snapshot desatualizado)
+_rebuild_lock = threading.Lock()
+
+# Marca gravada em df1.attrs por read_dataset: a versão dos dados que define a ordem das linhas
+ROW_ORDER_ATTR = 'row_order'
+
+# Tipos do pyarrow equivalentes aos dtypes de TRAIN_SCHEMA
+ARROW_TYPES = {
+    'string[pyarrow]': pa.string(),
+    'float64': pa.float64(),
+    'int64': pa.int64(),
+}
+
+# =========================
+# Functions / Funções
+#==========================
+def read_train_csv(path=DATASET_PATH, engine=None, **kwargs):
+    """ Esta função lê o train.csv já com os tipos declarados em TRAIN_SCHEMA
+
+        Os marcadores 'NaN ' viram NaN na leitura, as colunas que as páginas
+        não usam não são lidas e a leitura usa o leitor multi-thread do
+        pyarrow (a leitura em chunks usa o leitor 'c' do pandas).
+
+        Imput: caminho do arquivo, engine ('pyarrow' ou 'c'), demais
+               argumentos do pd.read_csv (somente engine 'c')
+        Output: Dataframe
+    """
+    if engine is None:
+        engine = 'c' if kwargs else 'pyarrow'
+
+    if engine == 'pyarrow':
+        # Os tipos vão direto para o leitor do pyarrow: deixá-lo inferir
+        # transformaria, por exemplo, o ID '0x4607 ' em número
+        convert_options = pa_csv.ConvertOptions(
+            column_types={col: ARROW_TYPES[dtype] for col, dtype in TRAIN_SCHEMA.items()},
+            include_columns=list(TRAIN_SCHEMA),
+            null_values=NA_VALUES,
+            strings_can_be_null=True)
+        table = pa_csv.read_csv(path, convert_options=convert_options)
+        return table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+
+    return pd.read_csv(path,
+                       engine=engine,
+                       usecols=list(TRAIN_SCHEMA),
+                       dtype=TRAIN_SCHEMA,
+                       na_values=NA_VALUES,
+                       keep_default_na=False,
+                       **kwargs)
+
+def clean_code(df1, compact=True):
+    """ Esta função tem a responsabilidade de limpar o dataframe
+
+        Tipos de limpeza:
+        1. Remoção dos dados NaN (em uma única passada)
+        2. Remoção dos espaços das variáveis de texto
+        3. Mudaça do tipo da coluna de dados
+        4. Formatação da coluna de datas (e ordenação por data) e colunas
+           inteiras de calendário (ver utils/timebuckets.py)
+        5. Limpeza da coluna de tempo (Remoção do texto da variável numérica)
+        6. Cálculo da distância restaurante -> entrega (coluna 'Distance')
+        7. Tipos compactos: categóricas e inteiros estreitos (ver compact_dtypes)
+
+        Imput: Dataframe lido com read_train_csv, se deve compactar os tipos
+        Output: Dataframe    
+    """
+    # 1. Removendo linhas com NaN em qualquer coluna obrigatória
+    selected_lines = df1[NOT_NULL_COLUMNS].notna().all(axis=1)
+    df1 = df1.loc[selected_lines, :].reset_index(drop=True)
+
+    # 2. Removendo espaços dentro de strings
+    for col in STRIP_COLUMNS:
+        df1[col] = df1[col].str.strip()
+
+    # 3. Convertendo Age e Multiple Delivery para Int
+    df1 = df1.astype({'Delivery_person_Age': 'int64', 'multiple_deliveries': 'int64'})
+
+    # 4. Convertendo a coluna Date de texto para Datetime
+    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+
+    # Ordenado por data, os filtros de período viram busca binária (ver utils/filters.py)
+    df1 = df1.sort_values('Order_Date', kind='stable').reset_index(drop=True)
+
+    # Dia, semana, mês e dia da semana como inteiros, calculados uma única vez
+    df1[CALENDAR_COLUMNS] = calendar_columns(df1['Order_Date'])
+
+    # 5. Limpando a coluna 'Time_taken(min)'
+    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.slice(start=len(TIME_TAKEN_PREFIX)).astype('int64')
+
+    # 6. Distância entre restaurante e local de entrega, em km
+    df1['Distance'] = delivery_distance(df1)
+
+    # 7. Tipos compactos
+    if compact:
+        df1 = compact_dtypes(df1)
+
+    return df1
+
+def compact_dtypes(df1):
+    """ Converte o dataframe para os tipos mais compactos
+
+        Colunas de CATEGORY_COLUMNS viram categóricas e inteiros são reduzidos
+        ao menor tipo que comporta os valores. Floats ficam em float64: são
+        medidas (avaliações, coordenadas) cujas médias o float32 deixaria
+        com ruído nas últimas casas (ex.: 3.746938943862915).
+
+        Imput: Dataframe limpo
+        Output: Dataframe
+    """
+    df1 = df1.copy()
+    for col in df1.columns:
+        if col in CATEGORY_COLUMNS:
+            df1[col] = df1[col].astype('category')
+        elif pd.api.types.is_integer_dtype(df1[col]):
+            df1[col] = pd.to_numeric(df1[col], downcast='integer')
+        elif pd.api.types.is_float_dtype(df1[col]):
+            # Lotes gravados por versões anteriores podem estar em float32
+            df1[col] = df1[col].astype('float64')
+    return df1
+
+def concat_frames(frames):
+    """ Concatena dataframes limpos mantendo as colunas categóricas
+
+        Sem unir as categorias antes, o pandas converteria para object as
+        colunas cujas categorias diferem entre os pedaços.
+    """
+    frames = list(frames)
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = pd.api.types.union_categoricals([f[col] for f in frames]).categories
+            frames = [f.assign(**{col: f[col].cat.set_categories(categories)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+def memory_report(df_before, df_after):
+    """ Bytes por coluna antes e depois da compactação dos tipos
+
+        Imput: Dataframe original, Dataframe compactado
+        Output: Dataframe com os bytes por coluna e a redução
+    """
+    report = pd.DataFrame({'before': df_before.memory_usage(index=False, deep=True),
+                           'after': df_after.memory_usage(index=False, deep=True)})
+    report.loc['Total'] = report.sum()
+    report['ratio'] = (report['before'] / report['after']).round(2)
+    return report
+
+def dataset_version(path=DATASET_PATH):
+    """ Retorna a versão do arquivo de dados (mtime e tamanho)
+
+        Qualquer alteração no arquivo muda a versão e invalida o cache.
+
+        Imput: caminho do arquivo
+        Output: tupla (mtime_ns, tamanho em bytes)
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def current_version(path=DATASET_PATH):
+    """ Versão dos dados servidos: a do CSV ou, sem o CSV, a do próprio snapshot
+
+        Usada como chave dos caches que dependem do dataset.
+    """
+    source = path if os.path.exists(path) else snapshot_path_for(path)
+    batches = tuple((os.path.basename(f),) + dataset_version(f) for f in batch_files(path))
+    return (dataset_version(source), batches)
+
+def appended_batches(path, previous_version, version):
+    """ Lotes acrescentados entre duas versões de current_version
+
+        Imput: caminho do CSV, versão anterior, versão atual
+        Output: caminhos dos lotes novos, ou None se o CSV ou algum lote
+                anterior mudou (nesse caso não há como só acrescentar)
+    """
+    (previous_source, previous_batches), (source, batches) = previous_version, version
+    if source != previous_source or batches[:len(previous_batches)] != previous_batches:
+        return None
+    return [os.path.join(batches_dir_for(path), name) for name, *_ in batches[len(previous_batches):]]
+
+def versioned_resource(version=current_version, extend=None, **cache_kwargs):
+    """ Decorador dos loaders compartilhados entre as sessões (st.cache_resource)
+
+        O construtor recebe (path, version, ...). O loader gerado recebe só
+        (path, ...) e completa 'version' com version(path): o resultado é
+        refeito quando os dados mudam, e 'version' só entra na chave do cache.
+        O Streamlit só é importado na primeira chamada: os módulos com loaders
+        continuam importáveis pela linha de comando e pelos processos do
+        relatório (utils/analytics.py) sem carregar o Streamlit.
+
+        Com 'extend', uma versão que só acrescenta lotes à última versão
+        montada no processo não refaz o resultado a partir do histórico:
+        extend(resultado anterior, caminhos dos lotes novos) devolve o novo.
+
+        Ex.:
+            @versioned_resource(max_entries=2, show_spinner='Montando cubo de pedidos...')
+            def load_cube(path, version):
+                return OrderCube(load_data(path, columns=CUBE_COLUMNS))
+
+        Imput: função path -> versão (padrão: current_version), função de
+               extensão (só com current_version), argumentos do st.cache_resource
+        Output: decorador
+    """
+    def decorator(builder):
+        if extend is None:
+            target = builder
+        else:
+            # Último resultado montado por (path, ...): a base das próximas versões
+            latest = {}
+
+            @functools.wraps(builder)
+            def build(path, data_version, *args):
+                previous = latest.get((path,) + args)
+                new_files = appended_batches(path, previous[0], data_version) if previous else None
+                if new_files:
+                    result = extend(previous[1], new_files)
+                else:
+                    result = builder(path, data_version, *args)
+                latest[(path,) + args] = (data_version, result)
+                return result
+
+            # A chave do st.cache_resource vem do nome e do código de 'builder' (functools.wraps)
+            target = build
+
+        cached = None
+
+        @functools.wraps(builder)
+        def loader(path=DATASET_PATH, *args):
+            nonlocal cached
+            if cached is None:
+                import streamlit as st
+                # Chamadas simultâneas podem criar dois wrappers: ambos usam o mesmo cache
+                cached = st.cache_resource(**cache_kwargs)(target)
+            return cached(path, version(path), *args)
+        return loader
+    return decorator
+
+def snapshot_path_for(path=DATASET_PATH):
+    """ Retorna o caminho do snapshot Arrow ao lado do CSV (train.csv -> train.arrow) """
+    return os.path.splitext(path)[0] + '.arrow'
+
+def batches_dir_for(path=DATASET_PATH):
+    """ Retorna a pasta dos lotes incrementais ao lado do CSV (dataset/batches) """
+    return os.path.join(os.path.dirname(path), 'batches')
+
+def batch_files(path=DATASET_PATH):
+    """ Lista, em ordem, os lotes Arrow já anexados ao dataset (ver utils/ingest.py) """
+    batches_dir = batches_dir_for(path)
+    if not os.path.isdir(batches_dir):
+        return []
+    return sorted(os.path.join(batches_dir, f) for f in os.listdir(batches_dir) if f.endswith('.arrow'))
+
+def snapshot_metadata(snapshot_path):
+    """ Metadados gravados por write_snapshot (bytes -> bytes) """
+    with pa.memory_map(snapshot_path) as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+
+def snapshot_version(snapshot_path):
+    """ Retorna a versão do CSV que gerou o snapshot, ou None se não houver snapshot
+
+        Imput: caminho do snapshot
+        Output: tupla (mtime_ns, tamanho em bytes) ou None
+    """
+    if not os.path.exists(snapshot_path):
+        return None
+
+    metadata = snapshot_metadata(snapshot_path)
+    if metadata.get(b'snapshot_format') != str(SNAPSHOT_FORMAT).encode():
+        return None
+    source_version = json.loads(metadata.get(b'source_version', b'null'))
+    if source_version is None:
+        return None
+    return tuple(source_version)
+
+def write_snapshot(df1, snapshot_path, source_version):
+    """ Grava um dataframe limpo em um arquivo Arrow, sem compressão
+
+        Imput: Dataframe limpo, caminho do arquivo, versão da origem dos dados
+        Output: None
+    """
+    table = pa.Table.from_pandas(df1, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'source_version'] = json.dumps(source_version).encode()
+    metadata[b'snapshot_format'] = str(SNAPSHOT_FORMAT).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Grava em um arquivo temporário único (na mesma pasta, para o os.replace ser
+    # atômico) para nunca expor um snapshot pela metade
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(snapshot_path) or '.',
+                                    prefix=os.path.basename(snapshot_path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, snapshot_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return None
+
+def build_snapshot(path=DATASET_PATH, snapshot_path=None):
+    """ Esta função lê e limpa o CSV e grava o resultado em um snapshot Arrow
+
+        O snapshot é gravado sem compressão para poder ser lido por memory
+        map, sem cópia, e guarda nos metadados a versão do CSV de origem.
+
+        Imput: caminho do CSV, caminho do snapshot
+        Output: Dataframe limpo
+    """
+    if snapshot_path is None:
+        snapshot_path = snapshot_path_for(path)
+
+    df1 = clean_code(read_train_csv(path))
+    write_snapshot(df1, snapshot_path, dataset_version(path))
+
+    return df1
+
+def read_snapshot(snapshot_path, columns=None):
+    """ Lê apenas as colunas pedidas do snapshot Arrow via memory map
+
+        Imput: caminho do snapshot, lista de colunas (None = todas)
+        Output: Dataframe
+    """
+    table = feather.read_table(snapshot_path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+def read_dataset(path=DATASET_PATH, columns=None):
+    """ Esta função lê o dataset limpo completo: snapshot + lotes incrementais
+
+        Se o snapshot não existir ou estiver desatualizado em relação ao CSV,
+        ele é regenerado a partir do CSV. Não usa cache (ver load_data).
+
+        Imput: caminho do CSV, lista de colunas (None = todas)
+        Output: Dataframe
+    """
+    snapshot_path = snapshot_path_for(path)
+    version = current_version(path)
+
+    # A ordenação por data precisa de 'Order_Date' mesmo quando a coluna não foi pedida
+    read_columns = columns
+    if columns is not None and 'Order_Date' not in columns:
+        read_columns = list(columns) + ['Order_Date']
+
+    # Snapshot ausente ou gerado a partir de outra versão do CSV: regenera (uma vez;
+    # quem esperava pela trava encontra o snapshot já atualizado)
+    if os.path.exists(path) and snapshot_version(snapshot_path) != dataset_version(path):
+        with _rebuild_lock:
+            if snapshot_version(snapshot_path) != dataset_version(path):
+                build_snapshot(path, snapshot_path)
+
+    # Lido sempre do arquivo: os tipos ficam iguais aos dos lotes e das próximas leituras
+    df1 = read_snapshot(snapshot_path, read_columns)
+
+    files = batch_files(path)
+    if files:
+        df1 = concat_frames([df1] + read_batches(files, read_columns))
+
+        # Lotes com datas anteriores às já existentes quebram a ordenação
+        if not df1['Order_Date'].is_monotonic_increasing:
+            df1 = df1.sort_values('Order_Date', kind='stable').reset_index(drop=True)
+
+    if read_columns is not columns:
+        df1 = df1.drop(columns='Order_Date')
+
+    # Mesma versão dos dados -> mesma ordem das linhas, qualquer que seja o conjunto
+    # de colunas: os índices por posição (bitmaps, espacial) conferem esta marca
+    df1.attrs[ROW_ORDER_ATTR] = version
+    return df1
+
+def read_batches(files, columns=None):
+    """ Lê lotes Arrow, regravando antes os de formato anterior (ver upgrade_batch)
+
+        Imput: caminhos dos lotes, lista de colunas (None = todas)
+        Output: lista de Dataframes, na ordem dos caminhos
+    """
+    for batch_file in files:
+        if snapshot_version(batch_file) is None:
+            with _rebuild_lock:
+                if snapshot_version(batch_file) is None:
+                    upgrade_batch(batch_file)
+    return [read_snapshot(f, columns) for f in files]
+
+def upgrade_batch(batch_file):
+    """ Regrava um lote de formato anterior com as colunas atuais
+
+        Os lotes não têm um CSV do qual possam ser refeitos: as colunas
+        derivadas que faltam são calculadas a partir das existentes.
+
+        Imput: caminho do lote Arrow
+        Output: None
+    """
+    metadata = snapshot_metadata(batch_file)
+    # Lotes sem a versão do CSV de origem ficam com a do próprio arquivo: uma
+    # versão nula faria o lote parecer desatualizado a cada leitura
+    source_version = json.loads(metadata.get(b'source_version', b'null')) or dataset_version(batch_file)
+    df1 = read_snapshot(batch_file)
+    for col in STRIP_COLUMNS:
+        df1[col] = df1[col].astype('string').str.strip()
+    missing = [col for col in CALENDAR_COLUMNS if col not in df1]
+    if missing:
+        df1[missing] = calendar_columns(df1['Order_Date'])[missing]
+    df1 = compact_dtypes(df1)
+    write_snapshot(df1, batch_file, source_version)
+    return None
+
+@versioned_resource(max_entries=8, show_spinner='Carregando dados...')
+def _load_clean_data(path, version, columns):
+    return read_dataset(path, list(columns) if columns is not None else None)
+
+def load_data(path=DATASET_PATH, columns=None):
+    """ Esta função carrega o dataframe limpo, compartilhado entre as sessões
+
+        Os dados vêm do snapshot Arrow e dos lotes incrementais (somente as
+        colunas pedidas, lidas via memory map), ver read_dataset.
+
+        O dataframe fica em memória até o CSV ou os lotes mudarem e é
+        compartilhado por todas as sessões, então deve ser tratado como
+        somente leitura: os filtros das páginas sempre geram um novo dataframe.
+
+        Imput: caminho do CSV, lista de colunas (None = todas)
+        Output: Dataframe
+    """
+    if columns is not None:
+        columns = tuple(columns)
+    return _load_clean_data(path, columns)
+
+# ========================================================================================================
+# Build step: python -m utils.data_loader [caminho do CSV]
+# ========================================================================================================
+if __name__ == '__main__':
+    import sys
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DATASET_PATH
+    df1 = build_snapshot(csv_path)
+    print(f'Snapshot {snapshot_path_for(csv_path)} gravado com {len(df1)} linhas')
+
+    # Memória por coluna antes/depois da compactação dos tipos
+    print(memory_report(clean_code(read_train_csv(csv_path), compact=False), df1))
@@ -0,0 +1,88 @@
+# Libraries / Bibliotecas
+import numpy as np
+import streamlit as st
+
+from utils.bitmaps import load_bitmap_index
+from utils.data_loader import DATASET_PATH, current_version
+from utils.filters import filter_orders
+
+# Colunas usadas para montar a tabela de entregadores
+STATS_COLUMNS = ['Delivery_person_ID', 'Delivery_person_Ratings', 'Time_taken(min)', 'City']
+
+# Colunas da tabela que podem ser usadas na ordenação
+SORT_COLUMNS = ['Delivery_person_ID', 'orders', 'rating_mean', 'rating_std',
+                'time_mean', 'time_min', 'time_max']
+
+PAGE_SIZE = 50
+
+# =========================
+# Functions / Funções
+#==========================
+def deliverer_stats(df1):
+    """ Monta a tabela com uma linha por entregador
+
+        Avaliação (média e desvio padrão), quantidade de pedidos, tempo de
+        entrega (média, mínimo e máximo) e cidades atendidas.
+
+        Imput: Dataframe com as colunas STATS_COLUMNS
+        Output: Dataframe ordenado por 'Delivery_person_ID'
+    """
+    grouped = df1.groupby('Delivery_person_ID', observed=True, sort=True)
+    stats = grouped.agg(orders=('Delivery_person_ID', 'size'),
+                        rating_mean=('Delivery_person_Ratings', 'mean'),
+                        rating_std=('Delivery_person_Ratings', 'std'),
+                        time_mean=('Time_taken(min)', 'mean'),
+                        time_min=('Time_taken(min)', 'min'),
+                        time_max=('Time_taken(min)', 'max'))
+
+    # Cidades atendidas, em ordem alfabética, separadas por vírgula
+    pares = df1[['Delivery_person_ID', 'City']].drop_duplicates()
+    pares = pares.astype({'City': str}).sort_values('City', kind='stable')
+    stats['cities'] = pares.groupby('Delivery_person_ID', observed=True)['City'].agg(', '.join)
+
+    stats = stats.reset_index()
+    stats['Delivery_person_ID'] = stats['Delivery_person_ID'].astype(str)
+    stats[['rating_mean', 'rating_std', 'time_mean']] = stats[['rating_mean', 'rating_std', 'time_mean']].round(2)
+    return stats
+
+def stats_page(stats, query='', sort_by='orders', ascending=False, page=1, page_size=PAGE_SIZE):
+    """ Busca, ordena e recorta uma página da tabela de entregadores
+
+        Só a página pedida sai daqui para o navegador.
+
+        Imput: tabela (deliverer_stats), trecho do ID, coluna de ordenação,
+               ordem crescente, número da página (a partir de 1), linhas por página
+        Output: (Dataframe da página, total de linhas encontradas, total de páginas)
+    """
+    if query:
+        ids = stats['Delivery_person_ID']
+        stats = stats[ids.str.contains(query.strip(), case=False, regex=False).to_numpy()]
+
+    total = len(stats)
+    n_pages = max(1, int(np.ceil(total / page_size)))
+    page = min(max(1, page), n_pages)
+
+    # Empates sempre em ordem crescente de ID e valores ausentes no fim, nos dois sentidos
+    if sort_by == 'Delivery_person_ID':
+        stats = stats.sort_values(sort_by, ascending=ascending, na_position='last', kind='stable')
+    else:
+        stats = stats.sort_values([sort_by, 'Delivery_person_ID'], ascending=[ascending, True],
+                                  na_position='last', kind='stable')
+    start = (page - 1) * page_size
+    df_page = stats.iloc[start:start + page_size].reset_index(drop=True)
+    return df_page, total, n_pages
+
+@st.cache_resource(max_entries=16, show_spinner='Montando tabela de entregadores...')
+def _load_deliverer_stats(_df1, path, version, date_limit, filters):
+    # '_df1' fica fora da chave: o resultado depende só dos dados ('version') e dos filtros
+    return deliverer_stats(filter_orders(_df1, date_limit, index=load_bitmap_index(path), **dict(filters)))
+
+def load_deliverer_stats(df1, date_limit=None, path=DATASET_PATH, **filters):
+    """ Tabela de entregadores do filtro, calculada uma vez e compartilhada entre as sessões
+
+        Imput: Dataframe compartilhado (load_data, com STATS_COLUMNS e as
+               colunas filtradas), data limite, listas de valores por coluna
+        Output: Dataframe (ver deliverer_stats)
+    """
+    key = tuple(sorted((col, tuple(sorted(values))) for col, values in filters.items()))
+    return _load_deliverer_stats(df1, path, current_version(path), date_limit, key)
@@ -0,0 +1,75 @@
+# Libraries / Bibliotecas
+import numpy as np
+
+from utils.data_loader import ROW_ORDER_ATTR
+
+# =========================
+# Functions / Funções
+#==========================
+def date_bounds(df1, end=None, start=None):
+    """ Posições [lo, hi) do período, por busca binária na coluna 'Order_Date'
+
+        Imput: Dataframe ordenado, data final (exclusiva), data inicial (inclusiva)
+        Output: (lo, hi)
+    """
+    dates = df1['Order_Date'].to_numpy()
+
+    lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start), side='left'))
+    hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end), side='left'))
+    return lo, hi
+
+def date_slice(df1, end=None, start=None):
+    """ Recorte por data usando busca binária na coluna 'Order_Date'
+
+        O dataframe compartilhado já vem ordenado por 'Order_Date' (ver
+        clean_code), então o recorte é um slice posicional que não copia os
+        dados.
+
+        Imput: Dataframe ordenado, data final (exclusiva), data inicial (inclusiva)
+        Output: Dataframe (view)
+    """
+    lo, hi = date_bounds(df1, end=end, start=start)
+    return df1.iloc[lo:hi]
+
+def filter_orders(df1, date_limit=None, start=None, index=None, positions=None, **filters):
+    """ Aplica os filtros da barra lateral de uma só vez
+
+        Primeiro recorta o período com date_slice e depois combina os filtros
+        de categoria em uma única máscara, aplicada uma única vez. Com um
+        BitmapIndex (ver utils/bitmaps.py) as colunas indexadas são filtradas
+        por operações de bits; as demais, por isin.
+
+        Ex.: filter_orders(df1, date_slider, index=load_bitmap_index(), Road_traffic_density=traffic_options)
+
+        Imput: Dataframe ordenado, data limite, data inicial, BitmapIndex do
+               dataframe, posições (iloc) já selecionadas (ex.: filtro
+               geográfico), listas de valores por coluna
+        Output: Dataframe
+    """
+    # O índice só vale para um dataframe com as mesmas linhas, na mesma ordem
+    if index is not None and (len(index) != len(df1) or index.row_order != df1.attrs.get(ROW_ORDER_ATTR)):
+        raise ValueError('O índice de bitmaps não corresponde ao dataframe')
+
+    lo, hi = date_bounds(df1, end=date_limit, start=start)
+    df1 = df1.iloc[lo:hi]
+    if not filters and positions is None:
+        return df1
+
+    if index is not None:
+        indexed = {col: values for col, values in filters.items() if col in index}
+        selected_lines = index.select(lo, hi, **indexed)
+    else:
+        indexed = {}
+        selected_lines = np.ones(len(df1), dtype=bool)
+
+    for col, values in filters.items():
+        if col not in indexed:
+            selected_lines &= df1[col].isin(values).to_numpy()
+
+    if positions is not None:
+        positions = np.asarray(positions)
+        in_period = positions[(positions >= lo) & (positions < hi)] - lo
+        keep = np.zeros(len(df1), dtype=bool)
+        keep[in_period] = True
+        selected_lines &= keep
+    return df1.loc[selected_lines, :]
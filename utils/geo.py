@@ -0,0 +1,41 @@
+# Libraries / Bibliotecas
+import numpy as np
+
+from utils.aggregates import plain_values
+
+# Raio médio da Terra em km (mesmo valor usado pela biblioteca haversine)
+EARTH_RADIUS_KM = 6371.0088
+
+# =========================
+# Functions / Funções
+#==========================
+def haversine_np(lat1, lon1, lat2, lon2):
+    """ Distância de grande círculo (km) calculada de forma vetorizada
+
+        Imput: arrays (ou Series) de latitude/longitude de origem e destino, em graus
+        Output: array de distâncias em km
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype='float64')) for x in (lat1, lon1, lat2, lon2))
+
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def delivery_distance(df1):
+    """ Distância entre o restaurante e o local de entrega de cada pedido
+
+        Imput: Dataframe com as colunas de latitude/longitude
+        Output: array de distâncias em km
+    """
+    return haversine_np(df1['Restaurant_latitude'].to_numpy(),
+                        df1['Restaurant_longitude'].to_numpy(),
+                        df1['Delivery_location_latitude'].to_numpy(),
+                        df1['Delivery_location_longitude'].to_numpy())
+
+def mean_distance_by(df1, keys):
+    """ Distância média por grupo (ex.: 'City' ou as coordenadas do restaurante)
+
+        Imput: Dataframe com a coluna 'Distance', coluna(s) de agrupamento
+        Output: Dataframe
+    """
+    return plain_values(df1.groupby(keys, observed=True)['Distance'].mean().reset_index())
@@ -0,0 +1,145 @@
+# Libraries / Bibliotecas
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from utils.aggregates import merge_summaries, summarize
+from utils.data_loader import (DATASET_PATH, batches_dir_for, clean_code, current_version, dataset_version,
+                               read_dataset, read_train_csv, write_snapshot)
+
+# Agregados mantidos em disco e atualizados a cada lote:
+# nome -> (coluna(s) de agrupamento, colunas de valor)
+AGGREGATES = {
+    'daily': ('Order_Date', []),
+    'deliverers': ('Delivery_person_ID', ['Time_taken(min)', 'Delivery_person_Ratings']),
+    'cities': ('City', ['Time_taken(min)', 'Delivery_person_Ratings']),
+}
+
+# Versão dos dados (current_version) que os agregados em disco resumem
+MANIFEST_NAME = 'manifest.json'
+
+# =========================
+# Functions / Funções
+#==========================
+def aggregates_dir_for(path=DATASET_PATH):
+    """ Retorna a pasta dos agregados ao lado do CSV (dataset/aggregates) """
+    return os.path.join(os.path.dirname(path), 'aggregates')
+
+def build_aggregates(df1):
+    """ Calcula todos os agregados de AGGREGATES a partir de um dataframe limpo
+
+        Imput: Dataframe limpo
+        Output: dicionário nome -> resumo (ver utils/aggregates.py)
+    """
+    return {name: summarize(df1, keys, value_cols) for name, (keys, value_cols) in AGGREGATES.items()}
+
+def _replace_file(write, file_path):
+    # Grava em um temporário único na mesma pasta e troca de uma vez (ver write_snapshot)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix=os.path.basename(file_path) + '.',
+                                    suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def aggregates_version(path=DATASET_PATH):
+    """ Versão dos dados resumida pelos agregados em disco, ou None se não houver """
+    manifest_path = os.path.join(aggregates_dir_for(path), MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f).get('version')
+
+def read_aggregates(path=DATASET_PATH):
+    """ Lê os agregados gravados em disco
+
+        Só devolve agregados da versão atual dos dados: se o CSV ou os lotes
+        mudaram por fora de append_batch, os resumos em disco não valem mais.
+
+        Imput: caminho do CSV
+        Output: dicionário nome -> resumo, ou None se ausentes ou desatualizados
+    """
+    # Mesma representação gravada no manifest (tuplas viram listas no JSON)
+    if aggregates_version(path) != json.loads(json.dumps(current_version(path))):
+        return None
+    aggregates_dir = aggregates_dir_for(path)
+    files = {name: os.path.join(aggregates_dir, f'{name}.parquet') for name in AGGREGATES}
+    if not all(os.path.exists(f) for f in files.values()):
+        return None
+    return {name: pd.read_parquet(f) for name, f in files.items()}
+
+def write_aggregates(aggregates, path=DATASET_PATH):
+    """ Grava os agregados em dataset/aggregates/<nome>.parquet e a versão dos dados no manifest
+
+        O manifest é gravado por último: uma gravação interrompida deixa os
+        agregados com a versão antiga, e read_aggregates os descarta.
+    """
+    aggregates_dir = aggregates_dir_for(path)
+    os.makedirs(aggregates_dir, exist_ok=True)
+    for name, summary in aggregates.items():
+        _replace_file(summary.to_parquet, os.path.join(aggregates_dir, f'{name}.parquet'))
+
+    manifest = {'version': current_version(path), 'aggregates': sorted(aggregates)}
+    def write_manifest(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+    _replace_file(write_manifest, os.path.join(aggregates_dir, MANIFEST_NAME))
+    return None
+
+def rebuild_aggregates(path=DATASET_PATH):
+    """ Recalcula os agregados a partir de todo o histórico (snapshot + lotes) """
+    aggregates = build_aggregates(read_dataset(path))
+    write_aggregates(aggregates, path)
+    return aggregates
+
+def load_aggregates(path=DATASET_PATH):
+    """ Agregados da versão atual dos dados: os de disco ou, se desatualizados, recalculados """
+    return read_aggregates(path) or rebuild_aggregates(path)
+
+def append_batch(batch_path, path=DATASET_PATH):
+    """ Esta função anexa um novo lote de pedidos ao dataset
+
+        O lote é lido e limpo sozinho, gravado como um arquivo Arrow em
+        dataset/batches e os agregados em disco são atualizados combinando
+        o resumo do lote com o resumo já existente (gravado com a nova versão
+        dos dados). O custo depende só do tamanho do lote, não do histórico;
+        os loaders das páginas (cubo, sketches) também só somam o lote novo.
+
+        Imput: caminho do CSV do lote, caminho do CSV principal
+        Output: Dataframe limpo do lote
+    """
+    batches_dir = batches_dir_for(path)
+    os.makedirs(batches_dir, exist_ok=True)
+
+    batch_name = os.path.splitext(os.path.basename(batch_path))[0] + '.arrow'
+    batch_file = os.path.join(batches_dir, batch_name)
+    if os.path.exists(batch_file):
+        raise ValueError(f'O lote {batch_name} já foi anexado')
+
+    # Primeira execução (ou dados alterados por fora): resume o histórico uma vez
+    aggregates = load_aggregates(path)
+
+    df1 = clean_code(read_train_csv(batch_path))
+    write_snapshot(df1, batch_file, dataset_version(batch_path))
+
+    batch_aggregates = build_aggregates(df1)
+    for name, (keys, value_cols) in AGGREGATES.items():
+        aggregates[name] = merge_summaries(aggregates[name], batch_aggregates[name], value_cols)
+    write_aggregates(aggregates, path)
+
+    return df1
+
+# ========================================================================================================
+# Ingestão incremental: python -m utils.ingest lote1.csv [lote2.csv ...]
+# ========================================================================================================
+if __name__ == '__main__':
+    import sys
+
+    for batch_path in sys.argv[1:]:
+        df1 = append_batch(batch_path)
+        print(f'Lote {batch_path} anexado com {len(df1)} linhas')
@@ -0,0 +1,139 @@
+# Libraries / Bibliotecas
+import folium
+import numpy as np
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+from folium.plugins import FastMarkerCluster, HeatMap
+
+from utils.data_loader import DATASET_PATH, current_version, load_data, versioned_resource
+
+# Tamanho da célula da grade, em graus (~1,1 km)
+GRID_SIZE = 0.01
+
+GEO_COLUMNS = ['Order_Date', 'Road_traffic_density',
+               'Restaurant_latitude', 'Restaurant_longitude',
+               'Delivery_location_latitude', 'Delivery_location_longitude']
+
+# Camadas do mapa: tipo -> (nome da camada, coluna de latitude, coluna de longitude)
+LAYERS = {
+    'delivery': ('Entregas', 'Delivery_location_latitude', 'Delivery_location_longitude'),
+    'restaurant': ('Restaurantes', 'Restaurant_latitude', 'Restaurant_longitude'),
+}
+
+MAP_MODES = ['Heatmap', 'Clusters']
+
+# Cada célula vira um marcador com a quantidade de pedidos nas opções
+CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {orders: row[2]});
+    marker.bindPopup('Pedidos: ' + row[2]);
+    return marker;
+};
+"""
+
+# O cluster mostra a soma dos pedidos das células, não o número de células
+CLUSTER_ICON = """
+function (cluster) {
+    var total = 0;
+    cluster.getAllChildMarkers().forEach(function (marker) { total += marker.options.orders; });
+    return L.divIcon({html: '<div><span>' + total + '</span></div>',
+                      className: 'marker-cluster marker-cluster-medium',
+                      iconSize: new L.Point(40, 40)});
+}
+"""
+
+# =========================
+# Functions / Funções
+#==========================
+def build_geo_bins(df1, grid_size=GRID_SIZE):
+    """ Esta função agrega os pedidos em células de uma grade geográfica
+
+        Cada linha é uma combinação de tipo de local (entrega/restaurante),
+        dia, trânsito e célula da grade, com a quantidade de pedidos.
+
+        Imput: Dataframe limpo, tamanho da célula em graus
+        Output: Dataframe
+    """
+    frames = []
+    for kind, (_, lat_col, lon_col) in LAYERS.items():
+        df_aux = pd.DataFrame({
+            'kind': kind,
+            'Order_Date': df1['Order_Date'],
+            'Road_traffic_density': df1['Road_traffic_density'],
+            'lat_bin': np.floor(df1[lat_col].to_numpy() / grid_size).astype('int32'),
+            'lon_bin': np.floor(df1[lon_col].to_numpy() / grid_size).astype('int32'),
+        })
+        keys = ['kind', 'Order_Date', 'Road_traffic_density', 'lat_bin', 'lon_bin']
+        frames.append(df_aux.groupby(keys, observed=True).size().rename('orders').reset_index())
+
+    return pd.concat(frames, ignore_index=True)
+
+def select_bins(bins, kind, date_limit, traffic_options, grid_size=GRID_SIZE):
+    """ Células de um tipo de local para o estado dos filtros, com o centro de cada célula
+
+        Imput: células (build_geo_bins), tipo de local, data limite, opções de trânsito
+        Output: Dataframe com 'latitude', 'longitude' e 'orders'
+    """
+    selected = ((bins['kind'] == kind)
+                & (bins['Order_Date'] < date_limit)
+                & bins['Road_traffic_density'].isin(traffic_options))
+
+    df_aux = bins.loc[selected].groupby(['lat_bin', 'lon_bin'])['orders'].sum().reset_index()
+    df_aux['latitude'] = (df_aux['lat_bin'] + 0.5) * grid_size
+    df_aux['longitude'] = (df_aux['lon_bin'] + 0.5) * grid_size
+    return df_aux[['latitude', 'longitude', 'orders']]
+
+def build_map(bins, mode, date_limit, traffic_options):
+    """ Monta o mapa com uma camada por tipo de local, em modo heatmap ou clusters
+
+        Imput: células, modo ('Heatmap' ou 'Clusters'), data limite, opções de trânsito
+        Output: folium.Map
+    """
+    map = folium.Map(prefer_canvas=True)
+    bounds = []
+
+    for kind, (name, _, _) in LAYERS.items():
+        points = select_bins(bins, kind, date_limit, traffic_options)
+        layer = folium.FeatureGroup(name=name, show=(kind == 'delivery'))
+
+        if mode == 'Heatmap':
+            weights = points['orders'] / max(points['orders'].max(), 1)
+            HeatMap(np.column_stack([points['latitude'], points['longitude'], weights]).tolist(),
+                    radius=12).add_to(layer)
+        else:
+            FastMarkerCluster(points.to_numpy().tolist(),
+                              callback=CLUSTER_CALLBACK,
+                              icon_create_function=CLUSTER_ICON).add_to(layer)
+
+        layer.add_to(map)
+        if len(points):
+            bounds += [[points['latitude'].min(), points['longitude'].min()],
+                       [points['latitude'].max(), points['longitude'].max()]]
+
+    folium.LayerControl().add_to(map)
+    if bounds:
+        map.fit_bounds(bounds)
+    return map
+
+@versioned_resource(max_entries=2, show_spinner='Montando grade geográfica...')
+def load_geo_bins(path, version):
+    """ Células da grade compartilhadas entre as sessões, refeitas quando os dados mudam """
+    return build_geo_bins(load_data(path, columns=GEO_COLUMNS))
+
+@st.cache_data(max_entries=64, show_spinner='Desenhando mapa...')
+def _render_map_html(path, version, mode, date_limit, traffic_options, width, height):
+    map = build_map(load_geo_bins(path), mode, date_limit, list(traffic_options))
+    fig = folium.Figure(width=width, height=height).add_child(map)
+    return fig.render()
+
+def show_map(mode, date_limit, traffic_options, width=1024, height=600, path=DATASET_PATH):
+    """ Mostra o mapa de células; o HTML fica em cache por estado dos filtros
+
+        Imput: modo, data limite, opções de trânsito, tamanho do mapa
+        Output: None
+    """
+    html = _render_map_html(path, current_version(path), mode, date_limit,
+                            tuple(sorted(traffic_options)), width, height)
+    components.html(html, width=width, height=height + 10)
+    return None
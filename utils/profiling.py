@@ -0,0 +1,126 @@
+# Libraries / Bibliotecas
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils.result_cache import cache_stats
+
+# Liga a instrumentação para todas as sessões (CURRY_PROFILE=1) ou só para
+# quem abrir a página com ?profile=1
+PROFILE_ENV = 'CURRY_PROFILE'
+LOG_PATH = os.environ.get('CURRY_PROFILE_LOG', 'logs/timings.jsonl')
+
+_log_lock = threading.Lock()
+
+# =========================
+# Functions / Funções
+#==========================
+def profiling_enabled():
+    """ Indica se a instrumentação está ligada para esta sessão """
+    return os.environ.get(PROFILE_ENV) == '1' or st.query_params.get('profile') == '1'
+
+class RerunTimer:
+    """ Mede as etapas nomeadas de uma execução (rerun) de uma página
+
+        Uso:
+            timer = RerunTimer('visao_empresa')
+            with timer.stage('order_metric'):
+                fig = order_metric(...)
+            ...
+            timer.report()
+
+        payload() registra o tamanho (bytes) enviado ao navegador por elemento.
+        Desligado, stage() não mede nada e report() não mostra nem grava nada.
+    """
+
+    def __init__(self, page, log_path=LOG_PATH):
+        self.page = page
+        self.log_path = log_path
+        self.enabled = profiling_enabled()
+        self.run_id = uuid.uuid4().hex
+        self.records = []
+        self.payloads = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.records.append({'stage': name, 'seconds': time.perf_counter() - start})
+
+    def payload(self, name, nbytes):
+        if self.enabled:
+            self.payloads.append({'element': name, 'bytes': int(nbytes)})
+
+    def report(self):
+        """ Mostra os tempos na barra lateral e acrescenta os registros ao log JSONL """
+        if not self.enabled:
+            return None
+
+        total = time.perf_counter() - self._start
+        stats = cache_stats()
+        df_aux = pd.DataFrame(self.records + [{'stage': 'total', 'seconds': total}])
+        df_aux['ms'] = (df_aux['seconds'] * 1000).round(1)
+
+        with st.sidebar.expander('Tempos desta execução'):
+            st.dataframe(df_aux[['stage', 'ms']], hide_index=True, use_container_width=True)
+            if self.payloads:
+                df_payload = pd.DataFrame(self.payloads)
+                df_payload['KB'] = (df_payload['bytes'] / 1024).round(1)
+                st.dataframe(df_payload[['element', 'KB']], hide_index=True, use_container_width=True)
+            st.caption(f"Cache de resultados: {stats['hits']} acertos, {stats['misses']} faltas, "
+                       f"{stats['evictions']} despejos, {stats['entries']} entradas, "
+                       f"{stats['used_mb']} de {stats['budget_mb']} MB")
+
+        ctx = get_script_run_ctx()
+        record = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'page': self.page,
+            'session_id': ctx.session_id if ctx is not None else None,
+            'run_id': self.run_id,
+            'total_seconds': round(total, 6),
+            'stages': [{'stage': r['stage'], 'seconds': round(r['seconds'], 6)} for r in self.records],
+            'payloads': self.payloads,
+            'result_cache': stats,
+        }
+        write_log(record, self.log_path)
+        return None
+
+def write_log(record, log_path=LOG_PATH):
+    """ Acrescenta um registro JSON em uma linha do arquivo de log """
+    directory = os.path.dirname(log_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # As sessões rodam em threads do mesmo processo
+    with _log_lock, open(log_path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    return None
+
+def read_log(log_path=LOG_PATH):
+    """ Lê o log como um Dataframe com uma linha por etapa, para agregar os tempos
+
+        Ex.: read_log().groupby(['page', 'stage'])['seconds'].describe()
+    """
+    rows = []
+    with open(log_path) as f:
+        for line in f:
+            record = json.loads(line)
+            for stage in record['stages'] + [{'stage': 'total', 'seconds': record['total_seconds']}]:
+                rows.append({'timestamp': record['timestamp'], 'page': record['page'],
+                             'session_id': record['session_id'], 'run_id': record['run_id'], **stage})
+    return pd.DataFrame(rows)
@@ -0,0 +1,51 @@
+# Libraries / Bibliotecas
+import numpy as np
+
+# Métricas de ranking: nome -> (coluna, agregação, menor é melhor?)
+RANKING_METRICS = {
+    'min': ('Time_taken(min)', 'min', True),
+    'median': ('Time_taken(min)', 'median', True),
+    'mean': ('Time_taken(min)', 'mean', True),
+    'rating': ('Delivery_person_Ratings', 'mean', False),
+}
+
+# =========================
+# Functions / Funções
+#==========================
+def _smallest(values, k):
+    """ Posições dos k menores valores, em ordem, sem ordenar o array inteiro """
+    if len(values) > k:
+        candidates = np.argpartition(values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(values[candidates], kind='stable')]
+
+def rank_deliverers(df1, k=10, metric='min'):
+    """ Esta função monta os k melhores e os k piores entregadores de cada cidade
+
+        A métrica de cada entregador é calculada em um único groupby e, em
+        cada cidade, os k melhores/piores são escolhidos por seleção parcial
+        (argpartition), sem ordenar todos os entregadores.
+
+        Imput: Dataframe, k, métrica (ver RANKING_METRICS)
+        Output: (Dataframe dos melhores, Dataframe dos piores)
+    """
+    col, agg, lower_is_better = RANKING_METRICS[metric]
+
+    stats = (df1.groupby(['City', 'Delivery_person_ID'], observed=True)[col]
+                .agg(agg).dropna().reset_index())
+    values = stats[col].to_numpy(dtype='float64')
+    if not lower_is_better:
+        values = -values
+
+    best, worst = [], []
+    for positions in stats.groupby('City', observed=True).indices.values():
+        best.append(positions[_smallest(values[positions], k)])
+        worst.append(positions[_smallest(-values[positions], k)])
+
+    if not best:
+        return stats, stats
+
+    df_best = stats.iloc[np.concatenate(best)].reset_index(drop=True)
+    df_worst = stats.iloc[np.concatenate(worst)].reset_index(drop=True)
+    return df_best, df_worst
@@ -0,0 +1,98 @@
+# Libraries / Bibliotecas
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+# Orçamento de memória do cache de resultados, em MB (variável de ambiente CURRY_CACHE_MB)
+CACHE_BUDGET_MB = int(os.environ.get('CURRY_CACHE_MB', '256'))
+
+# =========================
+# Functions / Funções
+#==========================
+def result_size(value):
+    """ Tamanho aproximado (bytes) de um resultado guardado no cache
+
+        Dataframes e arrays pelo tamanho dos dados; tuplas, listas e
+        dicionários pela soma dos itens; o resto (ex.: figuras plotly) pelo
+        tamanho serializado.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(result_size(v) for v in value) + 64
+    if isinstance(value, dict):
+        return sum(result_size(v) for v in value.values()) + 64
+    if isinstance(value, (int, float, str, bool, np.generic)) or value is None:
+        return 64
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+class ResultCache(LRUCache):
+    """ Cache LRU limitado por memória, compartilhado por todas as sessões do processo
+
+        As chaves são (página, seção, estado normalizado dos filtros com a
+        versão do dataset). Quando o orçamento estoura, os resultados usados
+        há mais tempo saem primeiro. Os valores guardados são compartilhados:
+        quem lê não deve alterá-los.
+    """
+
+    def __init__(self, budget_bytes):
+        super().__init__(maxsize=budget_bytes, getsizeof=result_size)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+    def get_or_compute(self, key, compute):
+        """ Devolve o resultado guardado ou calcula, guarda e devolve
+
+            O cálculo acontece fora do lock; resultados maiores que o
+            orçamento inteiro não são guardados.
+        """
+        with self.lock:
+            try:
+                value = self[key]
+                self.hits += 1
+                return value
+            except KeyError:
+                self.misses += 1
+
+        value = compute()
+        with self.lock:
+            try:
+                self[key] = value
+            except ValueError:
+                pass
+        return value
+
+    def stats(self):
+        """ Acertos, faltas, despejos, entradas e memória usada (MB) """
+        with self.lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': round(self.hits / total, 3) if total else None,
+                    'entries': len(self),
+                    'used_mb': round(self.currsize / 2**20, 2),
+                    'budget_mb': round(self.maxsize / 2**20, 2)}
+
+    def clear(self):
+        with self.lock:
+            super().clear()
+            self.hits = self.misses = self.evictions = 0
+
+# Instância única do processo (o Streamlit roda todas as sessões em threads do mesmo processo)
+RESULT_CACHE = ResultCache(CACHE_BUDGET_MB * 2**20)
+
+def cache_stats():
+    """ Estatísticas do cache de resultados do processo """
+    return RESULT_CACHE.stats()
@@ -0,0 +1,66 @@
+# =========================
+# Schema do train.csv / train.csv schema
+#==========================
+
+# Marcadores de dado ausente usados no arquivo
+NA_VALUES = ['NaN', 'NaN ']
+
+# Tipo de cada coluna lida do arquivo. Colunas fora deste dicionário
+# (ex.: 'Time_Orderd', 'Time_Order_picked') não são lidas.
+TRAIN_SCHEMA = {
+    'ID': 'string[pyarrow]',
+    'Delivery_person_ID': 'string[pyarrow]',
+    'Delivery_person_Age': 'float64',
+    'Delivery_person_Ratings': 'float64',
+    'Restaurant_latitude': 'float64',
+    'Restaurant_longitude': 'float64',
+    'Delivery_location_latitude': 'float64',
+    'Delivery_location_longitude': 'float64',
+    'Order_Date': 'string[pyarrow]',
+    'Weatherconditions': 'string[pyarrow]',
+    'Road_traffic_density': 'string[pyarrow]',
+    'Vehicle_condition': 'int64',
+    'Type_of_order': 'string[pyarrow]',
+    'Type_of_vehicle': 'string[pyarrow]',
+    'multiple_deliveries': 'float64',
+    'Festival': 'string[pyarrow]',
+    'City': 'string[pyarrow]',
+    'Time_taken(min)': 'string[pyarrow]',
+}
+
+# Linhas com NaN em alguma destas colunas são descartadas
+NOT_NULL_COLUMNS = [
+    'Delivery_person_Age',
+    'multiple_deliveries',
+    'Road_traffic_density',
+    'City',
+    'Type_of_vehicle',
+    'Festival',
+]
+
+# Colunas de texto que chegam com espaços no final
+STRIP_COLUMNS = [
+    'ID',
+    'Delivery_person_ID',
+    'Weatherconditions',
+    'Road_traffic_density',
+    'Type_of_order',
+    'Type_of_vehicle',
+    'Festival',
+    'City',
+]
+
+# Prefixo dos valores da coluna 'Time_taken(min)', ex.: '(min) 24'
+TIME_TAKEN_PREFIX = '(min) '
+
+# Colunas de texto com poucos valores distintos (e o ID do entregador),
+# guardadas como categóricas (dicionário + códigos inteiros)
+CATEGORY_COLUMNS = [
+    'Delivery_person_ID',
+    'Weatherconditions',
+    'Road_traffic_density',
+    'Type_of_order',
+    'Type_of_vehicle',
+    'Festival',
+    'City',
+]
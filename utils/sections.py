@@ -0,0 +1,59 @@
+# Libraries / Bibliotecas
+import numpy as np
+import streamlit as st
+
+from utils.result_cache import RESULT_CACHE
+
+# st.fragment (ou st.experimental_fragment, Streamlit >= 1.33) reexecuta só a
+# função decorada quando um widget dela muda. Em versões sem fragmentos, a
+# seção roda normalmente junto com a página.
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+# =========================
+# Functions / Funções
+#==========================
+def section(func):
+    """ Decorador de seção: vira um fragmento quando o Streamlit suporta """
+    return _fragment(func) if _fragment is not None else func
+
+def state_key(*values):
+    """ Normaliza o estado dos filtros para uma tupla comparável e hasheável
+
+        Listas de opções (multiselect) viram tuplas ordenadas e sem repetição,
+        já que a ordem da seleção não muda o resultado. Arrays numpy (ex.:
+        posições do filtro geográfico) viram (tamanho, hash do conteúdo).
+
+        Ex.: state_key('visao_empresa', current_version(), date_slider, traffic_options)
+    """
+    key = []
+    for value in values:
+        if isinstance(value, np.ndarray):
+            key.append((len(value), hash(value.tobytes())))
+        elif isinstance(value, list):
+            key.append(tuple(sorted(set(value))))
+        elif isinstance(value, tuple):
+            key.append(value)
+        else:
+            key.append(value)
+    return tuple(key)
+
+def memo(name, inputs, compute):
+    """ Reaproveita o último resultado da seção enquanto suas entradas não mudarem
+
+        Guarda, na sessão, o último resultado de cada seção junto com as
+        entradas usadas. Um rerun causado por outro widget não recalcula a
+        seção. Na falta, consulta o cache de resultados do processo, em que
+        sessões com os mesmos filtros compartilham o cálculo.
+
+        Imput: nome da seção, entradas (ver state_key, começando pela página
+               e pela versão do dataset), função sem argumentos
+        Output: resultado de compute()
+    """
+    store = st.session_state.setdefault('_sections', {})
+    cached = store.get(name)
+    if cached is not None and cached[0] == inputs:
+        return cached[1]
+
+    result = RESULT_CACHE.get_or_compute((name,) + tuple(inputs), compute)
+    store[name] = (inputs, result)
+    return result
@@ -0,0 +1,111 @@
+# Libraries / Bibliotecas
+import numpy as np
+import pandas as pd
+
+from utils.cube import cell_mask, merge_cells
+from utils.data_loader import concat_frames, load_data, read_batches, versioned_resource
+
+# Dimensões das células dos sketches de tempo de entrega
+SKETCH_DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Weatherconditions', 'Type_of_order', 'Festival']
+SKETCH_COLUMNS = SKETCH_DIMENSIONS + ['Time_taken(min)']
+
+QUANTILES = {'P50': 0.50, 'P90': 0.90, 'P99': 0.99}
+
+# =========================
+# Functions / Funções
+#==========================
+def histogram_quantiles(histograms, quantiles, bin_width=1):
+    """ Quantis (por posição) a partir de histogramas de largura fixa
+
+        Imput: array (n, bins) de contagens, lista de quantis em [0, 1], largura do bin
+        Output: array (n, len(quantiles)); NaN para histogramas vazios
+    """
+    cumulative = np.cumsum(histograms, axis=1)
+    total = cumulative[:, -1:]
+
+    result = np.full((len(histograms), len(quantiles)), np.nan)
+    for j, q in enumerate(quantiles):
+        # Primeiro bin cuja contagem acumulada alcança q * total (ao menos 1 pedido)
+        target = np.maximum(np.ceil(q * total), 1)
+        bins = (cumulative < target).sum(axis=1)
+        result[:, j] = np.where(total[:, 0] > 0, bins * bin_width, np.nan)
+    return result
+
+class TimeQuantileCube:
+    """ Sketches combináveis do tempo de entrega
+
+        Para cada combinação de dia x City x Road_traffic_density x
+        Weatherconditions x Type_of_order x Festival guarda um histograma do
+        'Time_taken(min)' com bins de largura fixa. Somar histogramas combina
+        os sketches, então P50/P90/P99 de qualquer filtro saem da soma das
+        células selecionadas, sem reordenar os pedidos. Como o tempo é
+        registrado em minutos inteiros, bins de 1 minuto dão quantis exatos.
+    """
+
+    def __init__(self, df1, bin_width=1):
+        self.bin_width = bin_width
+        groups = df1.groupby(SKETCH_DIMENSIONS, observed=True, sort=True)
+        cells = groups.ngroup().to_numpy()
+        self.dims = groups.size().rename('orders').reset_index()
+
+        bins = (df1['Time_taken(min)'].to_numpy() // bin_width).astype('int64')
+        n_bins = int(bins.max()) + 1 if len(bins) else 1
+        flat = np.bincount(cells * n_bins + bins, minlength=len(self.dims) * n_bins)
+        self.histograms = flat.reshape(len(self.dims), n_bins).astype('uint32')
+
+    def merged(self, other):
+        """ Novo cubo com as células dos dois (histogramas somados), igual a OrderCube.merged
+
+            Imput: outro TimeQuantileCube, de mesma largura de bin
+            Output: TimeQuantileCube
+        """
+        n_bins = max(self.histograms.shape[1], other.histograms.shape[1])
+        histograms = np.zeros((len(self.dims) + len(other.dims), n_bins), dtype='uint32')
+        histograms[:len(self.dims), :self.histograms.shape[1]] = self.histograms
+        histograms[len(self.dims):, :other.histograms.shape[1]] = other.histograms
+
+        dims = concat_frames([self.dims, other.dims])
+        cube = TimeQuantileCube.__new__(TimeQuantileCube)
+        cube.bin_width = self.bin_width
+        cube.histograms = merge_cells(dims, SKETCH_DIMENSIONS, histograms, np.add)
+        cube.dims = dims.groupby(SKETCH_DIMENSIONS, observed=True, sort=True)['orders'].sum().reset_index()
+        return cube
+
+    def mask(self, date_limit=None, **filters):
+        """ Seleção de células, igual a OrderCube.mask """
+        return cell_mask(self.dims, date_limit, **filters)
+
+    def quantiles(self, selected, by=None, quantiles=QUANTILES):
+        """ Quantis do tempo de entrega das células selecionadas, por grupo
+
+            Imput: máscara de células, coluna(s) de agrupamento (None = total),
+                   dicionário nome -> quantil
+            Output: Dataframe com 'orders' e uma coluna por quantil
+        """
+        histograms = self.histograms[selected]
+        if by is None:
+            df_aux = pd.DataFrame({'orders': [int(histograms.sum())]})
+            merged = histograms.sum(axis=0, keepdims=True)
+        else:
+            by = [by] if isinstance(by, str) else list(by)
+            dims = self.dims.loc[selected, by + ['orders']]
+            df_aux = dims.groupby(by, observed=True, sort=True)['orders'].sum().reset_index()
+            merged = merge_cells(dims, by, histograms, np.add)
+
+        values = histogram_quantiles(merged, list(quantiles.values()), self.bin_width)
+        for j, name in enumerate(quantiles):
+            df_aux[name] = values[:, j]
+        return df_aux
+
+def extend_time_sketches(sketches, files):
+    """ Sketches com os pedidos de lotes novos somados, sem varrer o histórico """
+    return sketches.merged(TimeQuantileCube(concat_frames(read_batches(files, SKETCH_COLUMNS)), sketches.bin_width))
+
+@versioned_resource(extend=extend_time_sketches, max_entries=2,
+                    show_spinner='Montando sketches de tempo de entrega...')
+def load_time_sketches(path, version):
+    """ Sketches de tempo de entrega compartilhados entre as sessões
+
+        Lotes anexados depois da última montagem só são somados (extend_time_sketches).
+    """
+    return TimeQuantileCube(load_data(path, columns=SKETCH_COLUMNS))
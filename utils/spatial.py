@@ -0,0 +1,124 @@
+# Libraries / Bibliotecas
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import DATASET_PATH, load_data, versioned_resource
+from utils.geo import EARTH_RADIUS_KM, haversine_np
+
+# Tamanho da célula do índice, em graus (~5,5 km)
+CELL_SIZE = 0.05
+
+# Locais indexados: tipo -> (nome, coluna de latitude, coluna de longitude)
+LOCATIONS = {
+    'delivery': ('Entregas', 'Delivery_location_latitude', 'Delivery_location_longitude'),
+    'restaurant': ('Restaurantes', 'Restaurant_latitude', 'Restaurant_longitude'),
+}
+
+SPATIAL_COLUMNS = [col for _, lat_col, lon_col in LOCATIONS.values() for col in (lat_col, lon_col)]
+
+KM_PER_DEGREE = EARTH_RADIUS_KM * np.pi / 180
+
+# =========================
+# Functions / Funções
+#==========================
+class GridIndex:
+    """ Índice espacial em grade sobre um par de colunas latitude/longitude
+
+        As linhas são ordenadas pela célula da grade em que caem. Uma consulta
+        só visita as células que cruzam a área pedida e depois confere a
+        posição exata das linhas candidatas.
+
+        As consultas devolvem posições (iloc) no dataframe usado para montar
+        o índice, em ordem crescente.
+    """
+
+    def __init__(self, lat, lon, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.lat = np.asarray(lat, dtype='float64')
+        self.lon = np.asarray(lon, dtype='float64')
+
+        # Chave única por célula: linha da grade * largura + coluna da grade
+        self._width = int(np.ceil(360 / cell_size)) + 2
+        lat_bin = np.floor(self.lat / cell_size).astype('int64')
+        lon_bin = np.floor(self.lon / cell_size).astype('int64') + self._width // 2
+        keys = lat_bin * self._width + lon_bin
+
+        self.order = np.argsort(keys, kind='stable')
+        cells, self.starts = np.unique(keys[self.order], return_index=True)
+        self.ends = np.r_[self.starts[1:], len(keys)]
+        self.cell_lat = cells // self._width
+        self.cell_lon = cells % self._width - self._width // 2
+
+    def center(self):
+        """ Ponto central (mediana) dos locais indexados """
+        return float(np.median(self.lat)), float(np.median(self.lon))
+
+    def bounds(self):
+        """ Limites (lat_min, lat_max, lon_min, lon_max) dos locais indexados """
+        return float(self.lat.min()), float(self.lat.max()), float(self.lon.min()), float(self.lon.max())
+
+    def _rows(self, hit):
+        # Junta os intervalos [start, end) das células selecionadas sem laço em Python
+        starts, ends = self.starts[hit], self.ends[hit]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(np.r_[0, lengths[:-1]]), lengths)
+        return self.order[offsets + np.arange(lengths.sum())]
+
+    def within_bbox(self, lat_min, lat_max, lon_min, lon_max):
+        """ Linhas dentro do retângulo (ex.: a área visível do mapa) """
+        hit = ((self.cell_lat >= np.floor(lat_min / self.cell_size))
+               & (self.cell_lat <= np.floor(lat_max / self.cell_size))
+               & (self.cell_lon >= np.floor(lon_min / self.cell_size))
+               & (self.cell_lon <= np.floor(lon_max / self.cell_size)))
+        rows = self._rows(hit)
+
+        keep = ((self.lat[rows] >= lat_min) & (self.lat[rows] <= lat_max)
+                & (self.lon[rows] >= lon_min) & (self.lon[rows] <= lon_max))
+        return np.sort(rows[keep])
+
+    def within_radius(self, lat, lon, radius_km):
+        """ Linhas a até radius_km quilômetros do ponto (lat, lon) """
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = min(dlat / max(np.cos(np.radians(lat)), 1e-6), 180)
+        rows = self.within_bbox(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+
+        distances = haversine_np(lat, lon, self.lat[rows], self.lon[rows])
+        return rows[distances <= radius_km]
+
+@versioned_resource(max_entries=2, show_spinner='Montando índice espacial...')
+def load_spatial_indexes(path, version):
+    """ Índices de entregas e restaurantes compartilhados entre as sessões
+
+        As posições devolvidas valem para qualquer load_data da mesma versão
+        dos dados, antes de aplicar outros filtros: read_dataset devolve as
+        linhas na mesma ordem para qualquer conjunto de colunas.
+    """
+    df1 = load_data(path, columns=SPATIAL_COLUMNS)
+    return {kind: GridIndex(df1[lat_col], df1[lon_col]) for kind, (_, lat_col, lon_col) in LOCATIONS.items()}
+
+def geo_filter_widget(container=st.sidebar, path=DATASET_PATH):
+    """ Filtro geográfico: pedidos a até R km de um ponto ou dentro de uma área
+
+        Imput: onde desenhar os widgets (ex.: st.sidebar)
+        Output: posições (iloc) dos pedidos selecionados, ou None sem filtro
+    """
+    container.markdown('## Filtro geográfico')
+    mode = container.radio('Filtrar pedidos por', ['Nenhum', 'Raio', 'Área do mapa'], horizontal=True)
+    if mode == 'Nenhum':
+        return None
+
+    kinds = {name: kind for kind, (name, _, _) in LOCATIONS.items()}
+    kind = kinds[container.radio('Local', list(kinds), horizontal=True)]
+    index = load_spatial_indexes(path)[kind]
+
+    if mode == 'Raio':
+        center_lat, center_lon = index.center()
+        lat = container.number_input('Latitude do centro', value=center_lat, format='%.4f')
+        lon = container.number_input('Longitude do centro', value=center_lon, format='%.4f')
+        radius = container.slider('Raio (km)', min_value=1, max_value=50, value=5)
+        return index.within_radius(lat, lon, radius)
+
+    lat_min, lat_max, lon_min, lon_max = index.bounds()
+    lat_min, lat_max = container.slider('Latitude', min_value=lat_min, max_value=lat_max, value=(lat_min, lat_max))
+    lon_min, lon_max = container.slider('Longitude', min_value=lon_min, max_value=lon_max, value=(lon_min, lon_max))
+    return index.within_bbox(lat_min, lat_max, lon_min, lon_max)
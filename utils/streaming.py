@@ -0,0 +1,112 @@
+# Libraries / Bibliotecas
+import os
+
+import pandas as pd
+
+from utils.aggregates import merge_summaries, summarize
+from utils.data_loader import DATASET_PATH, clean_code, read_train_csv
+
+CHUNKSIZE = 200_000
+
+# Métricas das páginas calculadas em streaming:
+# nome -> (coluna(s) de agrupamento, colunas de valor)
+STREAMING_METRICS = {
+    'time_by_city': ('City', ['Time_taken(min)']),
+    'time_by_city_traffic': (['City', 'Road_traffic_density'], ['Time_taken(min)']),
+    'time_by_city_order': (['City', 'Type_of_order'], ['Time_taken(min)']),
+    'time_by_festival': ('Festival', ['Time_taken(min)']),
+    'rating_by_traffic': ('Road_traffic_density', ['Delivery_person_Ratings']),
+    'rating_by_weather': ('Weatherconditions', ['Delivery_person_Ratings']),
+}
+
+# Contagem de valores distintos: nome -> (coluna(s) de agrupamento, coluna contada)
+STREAMING_NUNIQUE = {
+    'deliverers_by_city': ('City', 'Delivery_person_ID'),
+}
+
+# =========================
+# Functions / Funções
+#==========================
+def read_clean_chunks(path=DATASET_PATH, chunksize=CHUNKSIZE):
+    """ Lê e limpa o CSV em pedaços, sem carregar o arquivo inteiro
+
+        Imput: caminho do CSV, linhas por pedaço
+        Output: gerador de Dataframes limpos
+    """
+    with read_train_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield clean_code(chunk)
+
+class SummaryAccumulator:
+    """ Acumula contagem, média, desvio padrão (Welford/Chan), mínimo e máximo por grupo """
+
+    def __init__(self, keys, value_cols):
+        self.keys = keys
+        self.value_cols = value_cols
+        self.summary = None
+
+    def update(self, chunk):
+        summary = summarize(chunk, self.keys, self.value_cols)
+        if self.summary is None:
+            self.summary = summary
+        else:
+            self.summary = merge_summaries(self.summary, summary, self.value_cols)
+        return self
+
+    def result(self):
+        return self.summary
+
+class NuniqueAccumulator:
+    """ Conta valores distintos por grupo guardando só os pares (grupo, valor) únicos """
+
+    def __init__(self, keys, value_col):
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        self.value_col = value_col
+        self.pairs = None
+
+    def update(self, chunk):
+        pairs = chunk[self.keys + [self.value_col]].drop_duplicates()
+        if self.pairs is not None:
+            pairs = pd.concat([self.pairs, pairs], ignore_index=True).drop_duplicates()
+        self.pairs = pairs
+        return self
+
+    def result(self):
+        return self.pairs.groupby(self.keys, observed=True)[self.value_col].nunique().rename('nunique').to_frame()
+
+def stream_metrics(path=DATASET_PATH, chunksize=CHUNKSIZE):
+    """ Esta função calcula as métricas das páginas lendo o CSV em pedaços
+
+        O pico de memória fica limitado ao tamanho do pedaço (mais o tamanho
+        dos resumos, que dependem só do número de grupos).
+
+        Imput: caminho do CSV, linhas por pedaço
+        Output: dicionário nome -> resumo (ver utils/aggregates.py)
+    """
+    accumulators = {name: SummaryAccumulator(keys, value_cols)
+                    for name, (keys, value_cols) in STREAMING_METRICS.items()}
+    accumulators.update({name: NuniqueAccumulator(keys, value_col)
+                         for name, (keys, value_col) in STREAMING_NUNIQUE.items()})
+
+    for chunk in read_clean_chunks(path, chunksize):
+        for accumulator in accumulators.values():
+            accumulator.update(chunk)
+
+    return {name: accumulator.result() for name, accumulator in accumulators.items()}
+
+# ========================================================================================================
+# Streaming: python -m utils.streaming [caminho do CSV] [linhas por pedaço]
+# ========================================================================================================
+if __name__ == '__main__':
+    import sys
+
+    from utils.ingest import aggregates_dir_for
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DATASET_PATH
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else CHUNKSIZE
+
+    output_dir = aggregates_dir_for(csv_path)
+    os.makedirs(output_dir, exist_ok=True)
+    for name, summary in stream_metrics(csv_path, chunksize).items():
+        summary.to_parquet(os.path.join(output_dir, f'{name}.parquet'))
+        print(f'{name}: {len(summary)} grupos')
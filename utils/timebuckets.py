@@ -0,0 +1,92 @@
+# Libraries / Bibliotecas
+import numpy as np
+import pandas as pd
+
+# Colunas inteiras de calendário geradas na limpeza a partir de 'Order_Date'
+#   Order_Day:    dias desde 1970-01-01
+#   Order_Week:   semana ISO como AAAASS (ano ISO * 100 + semana)
+#   Week_of_year: semana do ano com domingo como primeiro dia (mesmo valor do strftime('%U'))
+#   Order_Month:  mês como AAAAMM
+#   Weekday:      dia da semana (segunda = 0)
+CALENDAR_COLUMNS = ['Order_Day', 'Order_Week', 'Week_of_year', 'Order_Month', 'Weekday']
+
+# Granularidades da agregação por período: nome -> coluna de calendário
+GRANULARITIES = {
+    'day': 'Order_Day',
+    'week': 'Order_Week',
+    'month': 'Order_Month',
+}
+
+# =========================
+# Functions / Funções
+#==========================
+def calendar_columns(dates):
+    """ Calcula as colunas de CALENDAR_COLUMNS com aritmética inteira, sem formatar texto
+
+        Imput: Series de datas (datetime64)
+        Output: Dataframe com as colunas de calendário (mesmo índice)
+    """
+    values = dates.to_numpy(dtype='datetime64[D]')
+    days = values.astype(np.int64)
+
+    # 1970-01-01 foi uma quinta-feira (3, com segunda = 0)
+    weekday = (days + 3) % 7
+
+    months = values.astype('datetime64[M]').astype(np.int64)
+    year = months // 12 + 1970
+    month = months % 12 + 1
+    day_of_year = days - values.astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+
+    # Semana ISO: a da quinta-feira da mesma semana
+    thursday = (days - weekday + 3).astype('datetime64[D]')
+    iso_year = thursday.astype('datetime64[Y]').astype(np.int64) + 1970
+    iso_week = (thursday - thursday.astype('datetime64[Y]').astype('datetime64[D]')).astype(np.int64) // 7 + 1
+
+    # %U: semanas completas desde o primeiro domingo do ano
+    sunday_weekday = (weekday + 1) % 7
+    week_of_year = (day_of_year + 7 - sunday_weekday) // 7
+
+    return pd.DataFrame({
+        'Order_Day': days.astype('int32'),
+        'Order_Week': (iso_year * 100 + iso_week).astype('int32'),
+        'Week_of_year': week_of_year.astype('int8'),
+        'Order_Month': (year * 100 + month).astype('int32'),
+        'Weekday': weekday.astype('int8'),
+    }, index=dates.index)
+
+def bucket_start(keys, granularity):
+    """ Converte as chaves inteiras de um período na data de início do período
+
+        Imput: array de chaves (ver GRANULARITIES), granularidade
+        Output: array datetime64[ns]
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    if granularity == 'day':
+        start = keys.astype('datetime64[D]')
+    elif granularity == 'week':
+        # Segunda-feira da semana 1 é a segunda da semana que contém 4 de janeiro
+        iso_year, iso_week = keys // 100, keys % 100
+        jan4 = (iso_year - 1970).astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64) + 3
+        week1 = jan4 - (jan4 + 3) % 7
+        start = (week1 + (iso_week - 1) * 7).astype('datetime64[D]')
+    elif granularity == 'month':
+        year, month = keys // 100, keys % 100
+        start = ((year - 1970) * 12 + month - 1).astype('datetime64[M]').astype('datetime64[D]')
+    else:
+        raise ValueError(f'Granularidade desconhecida: {granularity} (use {list(GRANULARITIES)})')
+    return start.astype('datetime64[ns]')
+
+def time_rollup(df1, granularity='day', value_col=None, agg='size'):
+    """ Agrega os pedidos por período (dia, semana ISO ou mês) agrupando por inteiros
+
+        Imput: Dataframe com as colunas de calendário, granularidade,
+               coluna de valor e agregação (padrão: quantidade de pedidos)
+        Output: Dataframe com 'period' (início do período) e 'orders' (ou a coluna agregada)
+    """
+    key = GRANULARITIES[granularity]
+    if value_col is None:
+        df_aux = df1.groupby(key, sort=True).size().rename('orders').reset_index()
+    else:
+        df_aux = df1.groupby(key, sort=True)[value_col].agg(agg).reset_index()
+    df_aux.insert(0, 'period', bucket_start(df_aux.pop(key).to_numpy(), granularity))
+    return df_aux
@@ -0,0 +1,72 @@
+# Libraries / Bibliotecas
+import importlib
+import logging
+import os
+import threading
+
+from utils.data_loader import DATASET_PATH, versioned_resource
+
+# Aquecimento em segundo plano ligado por padrão (CURRY_WARMUP=0 desliga)
+WARMUP_ENV = 'CURRY_WARMUP'
+
+# Bibliotecas pesadas importadas só pelas visões que as usam. O orjson (opcional) é
+# importado pelo plotly no primeiro gráfico sem trava: duas sessões desenhando o
+# primeiro gráfico ao mesmo tempo podem receber o módulo ainda pela metade
+WARMUP_MODULES = ['orjson', 'plotly.express', 'plotly.graph_objects', 'folium', 'streamlit_folium']
+
+WARMUP_THREAD = 'curry-warmup'
+
+logger = logging.getLogger(__name__)
+
+class _WarmupThreadFilter(logging.Filter):
+    # Os spinners dos loaders avisam 'missing ScriptRunContext' fora de uma sessão
+    def filter(self, record):
+        return record.threadName != WARMUP_THREAD
+
+_thread_filter = _WarmupThreadFilter()
+
+# =========================
+# Functions / Funções
+#==========================
+def _warm(path):
+    # Importados aqui para o módulo continuar leve
+    from utils.bitmaps import load_bitmap_index
+    from utils.cube import load_cube
+    from utils.maps import load_geo_bins
+    from utils.sketches import load_time_sketches
+    from utils.spatial import load_spatial_indexes
+
+    # Os loaders usam os mesmos caches (st.cache_resource) que as páginas:
+    # uma página aberta durante o aquecimento espera pelo mesmo cálculo
+    for loader in (load_cube, load_bitmap_index, load_time_sketches, load_spatial_indexes, load_geo_bins):
+        try:
+            loader(path)
+        except Exception:
+            logger.exception('Falha no aquecimento: %s', loader.__name__)
+
+    for module in WARMUP_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+@versioned_resource(max_entries=1, show_spinner=False)
+def _start_warmup(path, version):
+    # Uma thread por versão dos dados: dados novos, novo aquecimento
+    logging.getLogger('streamlit.runtime.scriptrunner.script_run_context').addFilter(_thread_filter)
+    thread = threading.Thread(target=_warm, args=(path,), name=WARMUP_THREAD, daemon=True)
+    thread.start()
+    return thread
+
+def start_warmup(path=DATASET_PATH):
+    """ Prepara a camada de dados em segundo plano, uma vez por processo e versão dos dados
+
+        Monta o cubo de pedidos, os índices dos filtros, os sketches, os
+        índices espaciais e a grade do mapa e importa as bibliotecas de
+        gráficos e mapas, sem bloquear a execução da página que chamou.
+
+        Output: thread do aquecimento (None se desligado)
+    """
+    if os.environ.get(WARMUP_ENV, '1') == '0':
+        return None
+    return _start_warmup(path)